@@ -1,13 +1,22 @@
 from __future__ import annotations
+import contextvars
+import json
 import os
-from typing import List
+import re
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq # type: ignore
 
-from .tools import sql_tools, notes_tool
+from . import context_store
+from .tools import run_state
+from .ratelimit import RateLimitCallback, get_limiter
+from .resilience import BudgetExceeded, FakeLatencyChatModel, ResilientChatModel, brief_budget
 # Tools
 from ai_sales_assistant.agent.tools.sql_tools import (
     client_overview_tool,
@@ -89,9 +98,50 @@ Thought: {agent_scratchpad}
 
 prompt = ChatPromptTemplate.from_template(REACT_TEMPLATE).partial(system=SYSTEM_PROMPT)
 
+# Offline ReAct script for LLM_BACKEND=fake: one call per tool, in the preferred order
+_FAKE_STEPS = ["client_overview", "kpi_snapshot", "recent_interactions", "open_tickets", "notes_search"]
+_FAKE_CLIENT_RE = re.compile(r"brief for (.+?)\. Include")
+
+def _scripted_react(messages) -> str:
+    text = str(messages[-1].content)
+    if "\nQuestion: " not in text:
+        return "Not available (stub model)."
+    question = text.rsplit("\nQuestion: ", 1)[1]
+    m = _FAKE_CLIENT_RE.search(question)
+    name = m.group(1) if m else ""
+    step = question.count("\nObservation:")
+    if step >= len(_FAKE_STEPS):
+        return (
+            f"Thought: I now know the final answer\n"
+            f"Final Answer: Overview: {name}\nTalking points: Not available (stub model)"
+        )
+    tool = _FAKE_STEPS[step]
+    tool_input = name if tool == "notes_search" else json.dumps({"client_name": name})
+    return f"Thought: call {tool}\nAction: {tool}\nAction Input: {tool_input}"
+
 def _build_llm():
-    model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-    return ChatGroq(model=model, temperature=0.1)
+    # Every session shares one limiter, so concurrent briefs queue instead of hitting 429s.
+    # With the resilience wrapper the wrapper takes the limiter (per attempt, outside
+    # its timeouts); otherwise it is a callback on the model itself.
+    resilient = os.getenv("LLM_RESILIENCE", "1") != "0"
+    callbacks = [] if resilient else [RateLimitCallback(get_limiter())]
+    if os.getenv("LLM_BACKEND", "groq") == "fake":
+        # Local stand-in with injected latency, for load tests (benchmarks/loadgen.py)
+        llm = FakeLatencyChatModel(
+            respond=_scripted_react,
+            latency_s=float(os.getenv("FAKE_LLM_LATENCY_S", "0.3")),
+            tail_latency_s=float(os.getenv("FAKE_LLM_TAIL_S", "3")),
+            tail_prob=float(os.getenv("FAKE_LLM_TAIL_PROB", "0.02")),
+            error_prob=float(os.getenv("FAKE_LLM_ERROR_PROB", "0")),
+            callbacks=callbacks,
+        )
+    else:
+        model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+        llm = ChatGroq(model=model, temperature=0.1, callbacks=callbacks)
+    if not resilient:
+        return llm
+    # Cuts off slow calls, retries with backoff (optionally hedged) within the brief's budget
+    return ResilientChatModel(inner=llm, limiter=get_limiter())
 
 def _tool_list():
     # Order hints the flow; ReAct can still choose any
@@ -105,8 +155,7 @@ def _tool_list():
 
 def build_agent() -> AgentExecutor:
      # reset once-per-executor
-    sql_tools.reset_used()
-    notes_tool.reset_used()
+    run_state.reset_used()
 
     llm = _build_llm()
     tools: List = _tool_list()
@@ -115,7 +164,7 @@ def build_agent() -> AgentExecutor:
     executor = AgentExecutor(
         agent=agent,
         tools=tools,
-        verbose=True,
+        verbose=os.getenv("AGENT_VERBOSE", "1") == "1",
         max_iterations=15,  # default was ~5
         max_execution_time=45,
         return_intermediate_steps=True,
@@ -128,74 +177,224 @@ def build_agent() -> AgentExecutor:
     )
     return executor
 
-def run_brief(client_name: str) -> str:
-    """Convenience method to get a brief for a single client."""
+TALKING_POINTS_QUERY = (
+    "Prepare a pre-call brief for {client_name}. Include only factual info from tools. "
+    "Return ONLY the 'Talking points' section as 3-5 concise, professional bullets. "
+    "Do not include Overview, KPIs, Risks, or References. Avoid repeating raw notes; "
+    "synthesize next-step discussion items based on recent interactions, KPIs, and open tickets."
+)
+
+SYNTH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT + "\nAll tool results have already been gathered for you below; do not ask for more data."),
+    ("human", "Client context (JSON):\n{context}\n\n{instruction}"),
+])
+
+SYNTH_INSTRUCTIONS = {
+    "brief": "Write the full pre-call brief for {client_name}.",
+    "talking_points": (
+        "Return ONLY the 'Talking points' section for {client_name} as 3-5 concise, professional bullets. "
+        "Do not include Overview, KPIs, Risks, or References."
+    ),
+}
+
+# Total model time allowed per brief; matches the executor's max_execution_time
+BRIEF_BUDGET_S = float(os.getenv("BRIEF_BUDGET_S", "45"))
+
+# Background workers for deadline mode; agent runs may outlive the request that started them
+_BRIEF_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("BRIEF_WORKERS", "8")), thread_name_prefix="brief")
+# Separate pool for the quick context fetches, so they never queue behind long agent runs
+_CONTEXT_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("CONTEXT_WORKERS", "8")), thread_name_prefix="context")
+
+# Last resort when neither the agent nor the data-only fallback produced a brief
+BRIEF_UNAVAILABLE = "Agent stopped due to iteration limit or time limit."
+
+def _agent_brief(client_name: str) -> str:
     executor = build_agent()
     query = f"Prepare a pre-call brief for {client_name}. Include only factual info from tools."
-    result = executor.invoke({"input": query})
-    output = (result.get("output", "") or "").strip()
+    try:
+        with brief_budget(BRIEF_BUDGET_S):
+            result = executor.invoke({"input": query})
+    except BudgetExceeded:
+        # Out of time; callers fall back to the deterministic brief
+        return ""
+    return (result.get("output", "") or "").strip()
+
+def run_brief(client_name: str) -> str:
+    """Convenience method to get a brief for a single client."""
+    output = _agent_brief(client_name)
     if output:
         return output
 
     # Deterministic fallback: synthesize a brief directly from repositories and notes
     try:
-        from ai_sales_assistant.db import repositories as repo
-        from ai_sales_assistant.rag.retriever import notes_search
-
-        ov = repo.client_overview(client_name)
-        kpis = repo.kpi_snapshot(client_name, 3)
-        interactions = repo.recent_interactions(client_name, 3)
-        tickets = repo.open_tickets(client_name)
-        notes = notes_search(query=client_name, k=3, client_name=client_name)
-
-        if ov:
-            overview = f"{ov.get('company_name','')} | {ov.get('industry','')} | {ov.get('region','')} (Owner: {ov.get('owner_name','')})"
-        else:
-            overview = "Not available"
-
-        if kpis:
-            last = kpis[-1]
-            spend = last.get("spend")
-            spend_part = f"Spend: {spend:.0f}; " if isinstance(spend, (int, float)) else ""
-            kpi_str = (
-                f"{spend_part}Sat: {last.get('satisfaction_score','?')}; Churn risk: {last.get('churn_risk','?')}%"
-            )
-        else:
-            kpi_str = "Not available"
-
-        risks = []
-        if kpis:
-            try:
-                if float(kpis[-1].get('churn_risk') or 0) >= 15:
-                    risks.append("Elevated churn risk")
-            except Exception:
-                pass
-            try:
-                if int(kpis[-1].get('open_tickets') or 0) >= 2:
-                    risks.append("Multiple open tickets")
-            except Exception:
-                pass
-        if any((t.get('priority') == 'High') and (t.get('status') in {'Open','Pending'}) for t in tickets):
-            risks.append("High-priority ticket pending")
-        risks_str = ", ".join(risks) if risks else "Not available"
-
-        tp = []
-        for it in interactions[:2]:
-            note = (it or {}).get('notes')
-            if note:
-                tp.append(note)
-        talking_points = "; ".join(tp)[:200] if tp else "Not available"
-
-        refs = ", ".join((n or {}).get('source','') for n in notes) if notes else "Not available"
-
-        brief = (
-            f"Overview: {overview}\n"
-            f"KPIs (last 3 months): {kpi_str}\n"
-            f"Risks: {risks_str}\n"
-            f"Talking points: {talking_points}\n"
-            f"References: {refs}"
+        return fallback_brief(fetch_context(client_name))
+    except Exception:
+        return BRIEF_UNAVAILABLE
+
+def run_talking_points(client_name: str) -> str:
+    """Talking-points-only variant of run_brief (no deterministic fallback)."""
+    executor = build_agent()
+    try:
+        with brief_budget(BRIEF_BUDGET_S):
+            result = executor.invoke({"input": TALKING_POINTS_QUERY.format(client_name=client_name)})
+    except BudgetExceeded:
+        return ""
+    return (result.get("output") or "").strip()
+
+def fetch_context(client_name: str, use_store: bool = True) -> Dict[str, Any]:
+    """Everything the brief is built from, fetched once straight from the repositories.
+
+    Reuses the persisted snapshot from context_store while the client's data
+    and the notes index are unchanged.
+    """
+    from ai_sales_assistant.db import repositories as repo
+    from ai_sales_assistant.rag.retriever import notes_search
+
+    fp = None
+    if use_store and context_store.ENABLED:
+        try:
+            fp = context_store.fingerprint(client_name)
+            cached = context_store.load(client_name, fp) if fp else None
+            if cached is not None:
+                return cached
+        except sqlite3.Error:
+            # Store unavailable (locked, read-only disk, old schema); just fetch
+            fp = None
+
+    ctx = {
+        "overview": repo.client_overview(client_name),
+        "kpis": repo.kpi_snapshot(client_name, 3),
+        "interactions": repo.recent_interactions(client_name, 3),
+        "tickets": repo.open_tickets(client_name),
+        "notes": notes_search(query=client_name, k=3, client_name=client_name),
+    }
+    if fp:
+        try:
+            context_store.save(client_name, fp, ctx)
+        except sqlite3.Error:
+            pass
+    return ctx
+
+def fallback_brief(ctx: Dict[str, Any]) -> str:
+    """Deterministic brief from a fetch_context() result; no LLM involved."""
+    ov = ctx.get("overview")
+    kpis = ctx.get("kpis") or []
+    interactions = ctx.get("interactions") or []
+    tickets = ctx.get("tickets") or []
+    notes = ctx.get("notes") or []
+
+    if ov:
+        overview = f"{ov.get('company_name','')} | {ov.get('industry','')} | {ov.get('region','')} (Owner: {ov.get('owner_name','')})"
+    else:
+        overview = "Not available"
+
+    if kpis:
+        last = kpis[-1]
+        spend = last.get("spend")
+        spend_part = f"Spend: {spend:.0f}; " if isinstance(spend, (int, float)) else ""
+        kpi_str = (
+            f"{spend_part}Sat: {last.get('satisfaction_score','?')}; Churn risk: {last.get('churn_risk','?')}%"
         )
-        words = brief.split()
-        return " ".join(words[:150]) if len(words) > 150 else brief
+    else:
+        kpi_str = "Not available"
+
+    risks = []
+    if kpis:
+        try:
+            if float(kpis[-1].get('churn_risk') or 0) >= 15:
+                risks.append("Elevated churn risk")
+        except Exception:
+            pass
+        try:
+            if int(kpis[-1].get('open_tickets') or 0) >= 2:
+                risks.append("Multiple open tickets")
+        except Exception:
+            pass
+    if any((t.get('priority') == 'High') and (t.get('status') in {'Open','Pending'}) for t in tickets):
+        risks.append("High-priority ticket pending")
+    risks_str = ", ".join(risks) if risks else "Not available"
+
+    tp = []
+    for it in interactions[:2]:
+        note = (it or {}).get('notes')
+        if note:
+            tp.append(note)
+    talking_points = "; ".join(tp)[:200] if tp else "Not available"
+
+    refs = ", ".join((n or {}).get('source','') for n in notes) if notes else "Not available"
+
+    brief = (
+        f"Overview: {overview}\n"
+        f"KPIs (last 3 months): {kpi_str}\n"
+        f"Risks: {risks_str}\n"
+        f"Talking points: {talking_points}\n"
+        f"References: {refs}"
+    )
+    words = brief.split()
+    return " ".join(words[:150]) if len(words) > 150 else brief
+
+def _synthesize(llm, ctx: Dict[str, Any], client_name: str, kind: str) -> str:
+    messages = SYNTH_PROMPT.format_messages(
+        context=json.dumps(ctx, default=str),
+        instruction=SYNTH_INSTRUCTIONS[kind].format(client_name=client_name),
+    )
+    return (llm.invoke(messages).content or "").strip()
+
+def run_brief_and_talking_points(client_name: str) -> Dict[str, str]:
+    """Both outputs from one context fetch and two parallel synthesis calls.
+
+    Skips the ReAct loop entirely: the tool data is gathered once by
+    fetch_context() and handed to the model directly.
+    """
+    try:
+        ctx = fetch_context(client_name)
+    except Exception:
+        # Same last resort as run_brief: without the data there is nothing to synthesize from
+        return {"brief": BRIEF_UNAVAILABLE, "talking_points": ""}
+    llm = _build_llm()
+    with brief_budget(BRIEF_BUDGET_S), ThreadPoolExecutor(max_workers=2) as pool:
+        # copy_context carries the budget into the worker threads
+        futures = {
+            kind: pool.submit(contextvars.copy_context().run, _synthesize, llm, ctx, client_name, kind)
+            for kind in SYNTH_INSTRUCTIONS
+        }
+    out = {}
+    for kind, fut in futures.items():
+        try:
+            out[kind] = fut.result()
+        except Exception:
+            out[kind] = ""
+    if not out["brief"]:
+        try:
+            out["brief"] = fallback_brief(ctx)
+        except Exception:
+            out["brief"] = BRIEF_UNAVAILABLE
+    return out
+
+def run_brief_with_deadline(client_name: str, deadline_s: float) -> Tuple[str, Optional[Future]]:
+    """Best brief available within `deadline_s` seconds, plus the agent run if still pending.
+
+    The agent and the deterministic context fetch start together. If the agent
+    answers in time its brief is returned; otherwise the fallback brief is
+    returned at the deadline together with the agent's Future, so the caller
+    can swap the agent brief in when (and if) it arrives.
+    """
+    started = time.monotonic()
+    ctx_f = _CONTEXT_POOL.submit(fetch_context, client_name)
+    agent_f = _BRIEF_POOL.submit(_agent_brief, client_name)
+    try:
+        output = agent_f.result(timeout=deadline_s)
+        if output:
+            return output, None
+    except FutureTimeout:
+        pass
+    except Exception:
+        # Agent failed outright; the fallback below is the answer
+        pass
+    pending = None if agent_f.done() else agent_f
+    try:
+        # Normally already finished; it ran alongside the agent. Never wait past the deadline.
+        left = max(deadline_s - (time.monotonic() - started), 0)
+        return fallback_brief(ctx_f.result(timeout=left)), pending
     except Exception:
-        return "Agent stopped due to iteration limit or time limit."
+        return BRIEF_UNAVAILABLE, pending
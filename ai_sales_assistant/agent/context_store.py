@@ -0,0 +1,114 @@
+"""
+Persisted per-client context snapshots for fetch_context().
+
+Each fetched context (overview, KPIs, interactions, tickets, top notes) is
+stored as one compressed binary value in a small SQLite key-value file
+(CONTEXT_STORE_DB, default local_context.db next to local.db), next to a
+fingerprint of the client's data: max row timestamps per table, open-ticket
+count, the client's change version, and the notes index stamp. A repeat view
+computes the fingerprint with one indexed query and, if it still matches,
+loads the context in a single read instead of four queries plus an embedding
+pass.
+
+Values are msgpack when the package is installed, otherwise JSON; both are
+zlib-compressed and prefixed with a one-byte format tag. No pickle.
+"""
+
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    msgpack = None
+
+ENABLED = os.getenv("CONTEXT_STORE", "1") == "1"
+STORE_PATH = os.getenv("CONTEXT_STORE_DB")
+
+
+def _plain(obj: Any) -> Any:
+    # numpy scalars from the retriever, dates, etc.
+    return obj.item() if hasattr(obj, "item") else str(obj)
+
+
+def encode(ctx: Dict[str, Any]) -> bytes:
+    if msgpack is not None:
+        return b"M" + zlib.compress(msgpack.packb(ctx, default=_plain, use_bin_type=True))
+    return b"J" + zlib.compress(json.dumps(ctx, default=_plain, separators=(",", ":")).encode("utf-8"))
+
+
+def decode(blob: bytes) -> Dict[str, Any]:
+    tag, body = blob[:1], zlib.decompress(blob[1:])
+    if tag == b"M":
+        if msgpack is None:
+            raise ValueError("context snapshot was written with msgpack, which is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+def _path() -> Path:
+    if STORE_PATH:
+        return Path(STORE_PATH)
+    from ai_sales_assistant.db.repositories import DB_PATH
+    return Path(DB_PATH).with_name("local_context.db")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_path(), timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS contexts ("
+        " key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, payload BLOB NOT NULL, updated_at REAL)"
+    )
+    return conn
+
+
+def _key(client_name: str) -> str:
+    return client_name.strip().lower()
+
+
+def fingerprint(client_name: str) -> Optional[str]:
+    """Current data fingerprint for the client, or None if no client matches."""
+    from ai_sales_assistant.db import repositories as repo
+    from ai_sales_assistant.rag.retriever import index_stamp
+
+    fresh = repo.client_freshness(client_name)
+    if fresh is None:
+        return None
+    return json.dumps([fresh, index_stamp()], sort_keys=True, default=str)
+
+
+def load(client_name: str, fp: str) -> Optional[Dict[str, Any]]:
+    """The stored context if it was saved under fingerprint `fp`, else None."""
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT fingerprint, payload FROM contexts WHERE key = ?", (_key(client_name),)).fetchone()
+    finally:
+        conn.close()
+    if row is None or row[0] != fp:
+        return None
+    try:
+        return decode(row[1])
+    except Exception:
+        # Unreadable (e.g. written by a newer format); refetch and overwrite
+        return None
+
+
+def save(client_name: str, fp: str, ctx: Dict[str, Any]) -> None:
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO contexts (key, fingerprint, payload, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET fingerprint = excluded.fingerprint, "
+                "payload = excluded.payload, updated_at = excluded.updated_at",
+                (_key(client_name), fp, encode(ctx), time.time()),
+            )
+    finally:
+        conn.close()
@@ -0,0 +1,206 @@
+"""
+Process-wide token-bucket limiter for LLM calls.
+
+Budgets both requests and tokens per minute (GROQ_RPM / GROQ_TPM) and admits
+callers strictly in arrival order, so one long-running brief cannot starve
+the others. With RATE_LIMIT_DB set, bucket levels live in a small SQLite file
+shared by every worker process on the host; otherwise they are in memory.
+
+The limiter is attached to the chat model as a LangChain callback: each call
+blocks in `on_chat_model_start` until its estimated tokens are available, and
+the estimate is corrected from the provider's reported usage afterwards.
+Behind agent/resilience.py the wrapper calls the limiter directly instead,
+once per attempt, before that attempt's timeout starts.
+"""
+
+from __future__ import annotations
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+RPM = float(os.getenv("GROQ_RPM", "30"))
+TPM = float(os.getenv("GROQ_TPM", "6000"))
+STATE_DB = os.getenv("RATE_LIMIT_DB")  # e.g. /tmp/ai_sales_ratelimit.db
+MAX_WAIT_S = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+# Completion tokens reserved per call until the real usage is known
+OUTPUT_TOKENS_ESTIMATE = int(os.getenv("RATE_LIMIT_OUTPUT_TOKENS", "400"))
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a call would have to queue longer than MAX_WAIT_S."""
+
+
+class _MemoryStore:
+    def __init__(self, capacity: Dict[str, float]):
+        self.level = dict(capacity)
+        self.updated = time.monotonic()
+
+    def take(self, cost: Dict[str, float], rate: Dict[str, float], capacity: Dict[str, float]) -> float:
+        """Deduct `cost` if every bucket can cover it; else return seconds to wait."""
+        now = time.monotonic()
+        elapsed, self.updated = now - self.updated, now
+        for k in self.level:
+            self.level[k] = min(capacity[k], self.level[k] + elapsed * rate[k])
+        wait = max((cost[k] - self.level[k]) / rate[k] for k in cost)
+        if wait <= 0:
+            for k in cost:
+                self.level[k] -= cost[k]
+        return max(wait, 0.0)
+
+    def adjust(self, key: str, delta: float, capacity: Dict[str, float]) -> None:
+        self.level[key] = min(capacity[key], self.level[key] + delta)
+
+
+class _SqliteStore:
+    """Same contract as _MemoryStore, with levels shared across processes."""
+
+    def __init__(self, path: str, capacity: Dict[str, float]):
+        self.path = path
+        with closing(self._connect()) as c:
+            c.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL, updated REAL)")
+            for k, cap in capacity.items():
+                c.execute("INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)", (k, cap, time.time()))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        return conn
+
+    def take(self, cost: Dict[str, float], rate: Dict[str, float], capacity: Dict[str, float]) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            level = {}
+            for name, lvl, upd in conn.execute("SELECT name, level, updated FROM buckets"):
+                if name in rate:
+                    level[name] = min(capacity[name], lvl + max(now - upd, 0) * rate[name])
+            wait = max((cost[k] - level[k]) / rate[k] for k in cost)
+            if wait <= 0:
+                for k in cost:
+                    level[k] -= cost[k]
+            conn.executemany("UPDATE buckets SET level = ?, updated = ? WHERE name = ?",
+                             [(lvl, now, k) for k, lvl in level.items()])
+            conn.execute("COMMIT")
+            return max(wait, 0.0)
+        finally:
+            conn.close()
+
+    def adjust(self, key: str, delta: float, capacity: Dict[str, float]) -> None:
+        with closing(self._connect()) as c:
+            c.execute("UPDATE buckets SET level = MIN(?, level + ?) WHERE name = ?", (capacity[key], delta, key))
+
+
+class TokenBucketLimiter:
+    """FIFO-fair limiter over a requests bucket and a tokens bucket."""
+
+    def __init__(self, rpm: float = RPM, tpm: float = TPM, state_db: Optional[str] = STATE_DB):
+        self.capacity = {"requests": rpm, "tokens": tpm}
+        self.rate = {"requests": rpm / 60.0, "tokens": tpm / 60.0}
+        self.store = _SqliteStore(state_db, self.capacity) if state_db else _MemoryStore(self.capacity)
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._serving = 0
+        self._done: set[int] = set()
+        self._waiting = 0
+        self._waits: List[float] = []
+        self._admitted = 0
+
+    def acquire(self, tokens: float, max_wait: float = MAX_WAIT_S) -> float:
+        """Block until one request and `tokens` tokens are available; returns seconds waited."""
+        # A single call larger than the bucket could never be admitted
+        cost = {"requests": 1.0, "tokens": min(float(tokens), self.capacity["tokens"])}
+        start = time.monotonic()
+        with self._cond:
+            ticket = next(self._tickets)
+            self._waiting += 1
+            try:
+                while True:
+                    head = ticket == self._serving
+                    wait = self.store.take(cost, self.rate, self.capacity) if head else 0.5
+                    if head and wait == 0:
+                        break
+                    if time.monotonic() - start + (wait if head else 0) > max_wait:
+                        raise RateLimitTimeout(f"LLM queue wait would exceed {max_wait:.1f}s")
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting -= 1
+                # Success or not, this ticket leaves the line; let the next one in
+                self._done.add(ticket)
+                while self._serving in self._done:
+                    self._done.remove(self._serving)
+                    self._serving += 1
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self._admitted += 1
+            self._waits = (self._waits + [waited])[-200:]
+        return waited
+
+    def reconcile(self, estimated: float, actual: float) -> None:
+        """Refund (or charge) the difference between estimated and reported tokens."""
+        if actual and actual != estimated:
+            self.store.adjust("tokens", estimated - actual, self.capacity)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = list(self._waits)
+            return {
+                "queue_depth": self._waiting,
+                "admitted": self._admitted,
+                "avg_wait_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "max_wait_s": round(max(waits), 3) if waits else 0.0,
+            }
+
+
+def estimate_tokens(messages: List[List[Any]]) -> float:
+    """Tokens to reserve for one call: the prompt (~4 chars per token) plus a completion allowance."""
+    chars = sum(len(str(getattr(m, "content", m))) for batch in messages for m in batch)
+    return chars / 4 + OUTPUT_TOKENS_ESTIMATE
+
+
+def usage_tokens(llm_output: Optional[Dict[str, Any]]) -> float:
+    """Total tokens the provider reported for a call (0 if unknown)."""
+    usage = (llm_output or {}).get("token_usage") or {}
+    return usage.get("total_tokens") or 0
+
+
+class RateLimitCallback(BaseCallbackHandler):
+    """Gate chat-model calls through a TokenBucketLimiter."""
+
+    raise_error = True  # let RateLimitTimeout abort the call
+
+    def __init__(self, limiter: TokenBucketLimiter):
+        self.limiter = limiter
+        self._estimates: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        estimate = estimate_tokens(messages)
+        self._estimates[run_id] = estimate
+        self.limiter.acquire(estimate)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        estimate = self._estimates.pop(run_id, 0.0)
+        self.limiter.reconcile(estimate, usage_tokens(getattr(response, "llm_output", None)))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._estimates.pop(run_id, None)
+
+
+_LIMITER: Optional[TokenBucketLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_limiter() -> TokenBucketLimiter:
+    """The process-wide limiter shared by every session."""
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = TokenBucketLimiter()
+        return _LIMITER
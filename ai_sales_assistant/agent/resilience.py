@@ -0,0 +1,299 @@
+"""
+Resilience wrapper for the chat model used by the agent.
+
+ResilientChatModel wraps any LangChain chat model and, per call:
+  - gives up on an attempt once it exceeds a latency threshold derived from a
+    percentile of recent call latencies (LLM_SLOW_PERCENTILE x LLM_SLOW_FACTOR),
+    then retries with exponential backoff;
+  - optionally fires a duplicate "hedged" request when the first is slow and
+    takes whichever answers first (LLM_HEDGE=1);
+  - never runs past the per-brief time budget set with `brief_budget()`.
+
+Only timeouts and transient provider errors (429, 5xx, connection failures)
+are retried; anything else (auth, bad request, context length) is raised at
+once, without spending more rate-limit budget. With hedging, a fast failure
+of one request does not abandon the other: it is awaited until the cutoff.
+
+Python threads cannot be killed, so an abandoned attempt finishes in the
+background and its result is discarded.
+
+With a `limiter`, each attempt (and each hedge) takes its rate-limit budget
+on the caller's thread before its timer starts, so time spent queueing for
+the limiter is never mistaken for a slow call. Latency history is kept per
+model name and shared by every wrapper instance (`tracker_for`).
+
+FakeLatencyChatModel is a local stand-in with injected latency for
+exercising all of this without network access, e.g.
+
+    slow = FakeLatencyChatModel(latency_s=0.05, tail_latency_s=5, tail_prob=0.1)
+    llm = ResilientChatModel(inner=slow, hedge=True)
+    with brief_budget(2.0):
+        llm.invoke("hi")
+"""
+
+from __future__ import annotations
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.pydantic_v1 import Field
+
+from .ratelimit import MAX_WAIT_S, RateLimitTimeout, TokenBucketLimiter, estimate_tokens, usage_tokens
+
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+BACKOFF_S = float(os.getenv("LLM_BACKOFF_S", "0.5"))
+HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+SLOW_PERCENTILE = float(os.getenv("LLM_SLOW_PERCENTILE", "0.95"))
+SLOW_FACTOR = float(os.getenv("LLM_SLOW_FACTOR", "1.5"))
+# Threshold bounds: used before enough samples exist / never cut faster than this
+INITIAL_TIMEOUT_S = float(os.getenv("LLM_INITIAL_TIMEOUT_S", "20"))
+MIN_TIMEOUT_S = float(os.getenv("LLM_MIN_TIMEOUT_S", "2"))
+
+_CALL_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_CALL_WORKERS", "16")), thread_name_prefix="llm")
+_DEADLINE: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("brief_deadline", default=None)
+
+
+class BudgetExceeded(TimeoutError):
+    """The per-brief time budget ran out before the model answered."""
+
+
+# Provider SDK errors (groq/openai clients) that carry no HTTP status but are transient
+_TRANSIENT_NAMES = {"APIConnectionError", "APITimeoutError"}
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether a failed call is worth retrying: timeouts, connection errors, 429 and 5xx."""
+    if isinstance(exc, (TimeoutError, ConnectionError)) or type(exc).__name__ in _TRANSIENT_NAMES:
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def _settled(done) -> bool:
+    # A success or a non-retryable failure decides the attempt; nothing left to wait for
+    return any(f.exception() is None or not is_transient(f.exception()) for f in done)
+
+
+@contextmanager
+def brief_budget(seconds: float) -> Iterator[None]:
+    """Cap the total model time of everything inside the block (contextvar-scoped)."""
+    token = _DEADLINE.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def budget_remaining() -> Optional[float]:
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 10):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def threshold(self, percentile: float, factor: float,
+                  floor: float = MIN_TIMEOUT_S, initial: float = INITIAL_TIMEOUT_S) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return initial
+        pct = samples[min(int(percentile * len(samples)), len(samples) - 1)]
+        return max(pct * factor, floor)
+
+
+_TRACKERS: Dict[str, LatencyTracker] = {}
+_TRACKERS_LOCK = threading.Lock()
+
+
+def tracker_for(model_name: str) -> LatencyTracker:
+    """Process-wide latency history for one model; a brief alone makes too few calls."""
+    with _TRACKERS_LOCK:
+        if model_name not in _TRACKERS:
+            _TRACKERS[model_name] = LatencyTracker()
+        return _TRACKERS[model_name]
+
+
+class ResilientChatModel(BaseChatModel):
+    """Retry / hedge / budget wrapper around another chat model."""
+
+    inner: BaseChatModel
+    limiter: Optional[TokenBucketLimiter] = None
+    max_retries: int = MAX_RETRIES
+    backoff_s: float = BACKOFF_S
+    hedge: bool = HEDGE
+    percentile: float = SLOW_PERCENTILE
+    slow_factor: float = SLOW_FACTOR
+    min_timeout_s: float = MIN_TIMEOUT_S
+    initial_timeout_s: float = INITIAL_TIMEOUT_S
+    # None = the shared tracker for the inner model's name
+    tracker: Optional[LatencyTracker] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{self.inner._llm_type}"
+
+    def _tracker(self) -> LatencyTracker:
+        if self.tracker is None:
+            name = getattr(self.inner, "model_name", None) or self.inner._llm_type
+            self.tracker = tracker_for(name)
+        return self.tracker
+
+    def _admit(self, tokens: float, max_wait: float) -> None:
+        if self.limiter is not None:
+            self.limiter.acquire(tokens, max_wait=max_wait)
+
+    def _call_inner(self, messages: List[BaseMessage], stop: Optional[List[str]], tokens: float,
+                    **kwargs: Any) -> ChatResult:
+        res = self.inner.generate([messages], stop=stop, **kwargs)
+        if self.limiter is not None:
+            self.limiter.reconcile(tokens, usage_tokens(res.llm_output))
+        return ChatResult(generations=res.generations[0], llm_output=res.llm_output)
+
+    def _submit(self, messages, stop, tokens, **kwargs):
+        ctx = contextvars.copy_context()
+        started = time.monotonic()
+        fut = _CALL_POOL.submit(ctx.run, self._call_inner, messages, stop, tokens, **kwargs)
+        return fut, started
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tracker = self._tracker()
+        tokens = estimate_tokens([messages])
+        last_error: Optional[BaseException] = None
+        for attempt in range(self.max_retries + 1):
+            remaining = budget_remaining()
+            if remaining is not None and remaining <= 0:
+                raise BudgetExceeded("brief time budget exhausted") from last_error
+            max_wait = MAX_WAIT_S if remaining is None else min(MAX_WAIT_S, remaining)
+            try:
+                # Queueing for the limiter happens here, before the attempt's clock starts
+                self._admit(tokens, max_wait)
+            except RateLimitTimeout as e:
+                if remaining is not None and remaining <= MAX_WAIT_S:
+                    raise BudgetExceeded("brief time budget exhausted waiting for the rate limiter") from e
+                raise
+
+            limit = tracker.threshold(self.percentile, self.slow_factor, self.min_timeout_s, self.initial_timeout_s)
+            remaining = budget_remaining()
+            if remaining is not None:
+                limit = min(limit, max(remaining, 0))
+
+            attempts = [self._submit(messages, stop, tokens, **kwargs)]
+            # With hedging, the duplicate goes out halfway through the allowed time
+            done, _ = wait([attempts[0][0]], timeout=limit / 2 if self.hedge else limit)
+            if not done and self.hedge:
+                try:
+                    # Only hedge with budget to spare; never queue behind other callers for it
+                    self._admit(tokens, max_wait=0)
+                    attempts.append(self._submit(messages, stop, tokens, **kwargs))
+                except RateLimitTimeout:
+                    pass
+            # Keep waiting on whatever is still running (e.g. the hedge after the
+            # first request failed fast) until one succeeds or the cutoff passes
+            cutoff = attempts[0][1] + limit
+            done = set(done)
+            pending = {f for f, _ in attempts} - done
+            while pending and not _settled(done) and time.monotonic() < cutoff:
+                more, pending = wait(pending, timeout=cutoff - time.monotonic(), return_when=FIRST_COMPLETED)
+                done |= more
+
+            for fut, started in attempts:
+                if fut in done and fut.exception() is None:
+                    tracker.record(time.monotonic() - started)
+                    for other, _ in attempts:
+                        other.cancel()
+                    return fut.result()
+            for fut, _ in attempts:
+                if fut in done and not is_transient(fut.exception()):
+                    for other, _ in attempts:
+                        other.cancel()
+                    raise fut.exception()
+            for fut, _ in attempts:
+                if fut in done:
+                    last_error = fut.exception()
+                else:
+                    fut.cancel()  # only helps if it never started; otherwise it finishes unobserved
+                    last_error = TimeoutError(f"LLM call exceeded {limit:.1f}s")
+
+            if attempt < self.max_retries:
+                sleep_s = self.backoff_s * (2 ** attempt) * (0.5 + random.random())
+                remaining = budget_remaining()
+                if remaining is not None:
+                    sleep_s = min(sleep_s, max(remaining, 0))
+                time.sleep(sleep_s)
+        remaining = budget_remaining()
+        if isinstance(last_error, TimeoutError) and remaining is not None and remaining <= 0:
+            raise BudgetExceeded("brief time budget exhausted") from last_error
+        raise last_error  # type: ignore[misc]
+
+
+_FAKE_LOCK = threading.Lock()
+
+
+class FakeLatencyChatModel(BaseChatModel):
+    """Offline chat model with injected latency, for tests and load runs.
+
+    Replies with `respond(messages)` when given, else cycles `responses`.
+    Each call sleeps `latency_s`, or `tail_latency_s` with probability
+    `tail_prob` (after the fixed `latency_script`, if any); `error_prob`
+    makes a call raise a (transient) ConnectionError instead.
+    """
+
+    responses: List[str] = Field(default_factory=lambda: ["Final Answer: Not available"])
+    respond: Optional[Callable[[List[BaseMessage]], str]] = None
+    latency_s: float = 0.05
+    # Per-call latencies consumed in order before latency_s/tail apply (for tests)
+    latency_script: List[float] = Field(default_factory=list)
+    tail_latency_s: float = 2.0
+    tail_prob: float = 0.0
+    error_prob: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        with _FAKE_LOCK:
+            n = self.calls
+            self.calls += 1
+        if n < len(self.latency_script):
+            time.sleep(self.latency_script[n])
+        else:
+            time.sleep(self.tail_latency_s if random.random() < self.tail_prob else self.latency_s)
+        if random.random() < self.error_prob:
+            raise ConnectionError("injected LLM failure")
+        text = self.respond(messages) if self.respond else self.responses[n % len(self.responses)]
+        for s in stop or []:
+            text = text.split(s)[0]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
@@ -0,0 +1,15 @@
+from __future__ import annotations
+import threading
+
+# Once-per-run tool guards. Per thread: briefs may run concurrently (deadline
+# mode, several sessions) and must not see each other's calls.
+_state = threading.local()
+
+def used() -> set[str]:
+    """Names of the tools already called in this thread's current agent run."""
+    if not hasattr(_state, "used"):
+        _state.used = set()
+    return _state.used
+
+def reset_used() -> None:
+    used().clear()
@@ -2,13 +2,9 @@ from __future__ import annotations
 from typing import Optional, List, Dict, Any
 import json
 from langchain.tools import StructuredTool
+from ai_sales_assistant.agent.tools.run_state import used
 from ai_sales_assistant.db import repositories as repo
 
-USED: set[str] = set()
-
-def reset_used() -> None:
-    USED.clear()
-
 def _normalize_name(arg: Any) -> str:
     """Accept plain name, or JSON string with client_name/company_name, or dict.
     Returns best-effort extracted company name.
@@ -33,9 +29,9 @@ def _normalize_name(arg: Any) -> str:
 
 def _ov(client_name: str):
     name = _normalize_name(client_name)
-    if "client_overview" in USED:
+    if "client_overview" in used():
         return "Already called client_overview; do not call again."
-    USED.add("client_overview")
+    used().add("client_overview")
     r = repo.client_overview(name)
     return r if r else {"not_found": True}
 
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import sqlite3
 from pathlib import Path
 import streamlit as st
@@ -23,6 +23,10 @@ def init_session(limit: int = 20) -> None:
         st.session_state.calls_used = 0
     if "call_limit" not in st.session_state:
         st.session_state.call_limit = limit
+    if "brief_cache" not in st.session_state:
+        st.session_state.brief_cache = {}
+    if "pending_briefs" not in st.session_state:
+        st.session_state.pending_briefs = {}
 
 def can_call() -> bool:
     return st.session_state.calls_used < st.session_state.call_limit
@@ -30,6 +34,36 @@ def can_call() -> bool:
 def bump_calls() -> None:
     st.session_state.calls_used += 1
 
+# ---------- Per-session brief cache ----------
+# Entries are (data_version, markdown); a brief is served only while the client's
+# data still has the version it was generated from.
+def data_version(client_name: str) -> Optional[Tuple]:
+    """Fingerprint of the client's rows (see repositories.client_freshness)."""
+    from ai_sales_assistant.db.repositories import client_freshness
+
+    try:
+        f = client_freshness(client_name)
+    except sqlite3.Error:
+        return None
+    return tuple(f.values()) if f else None
+
+def cached_brief(client_name: str, brief_type: str, check_version: bool = True) -> Optional[str]:
+    entry = st.session_state.brief_cache.get((client_name.lower(), brief_type))
+    if entry is None:
+        return None
+    version, markdown_text = entry
+    if check_version and version != data_version(client_name):
+        return None
+    return markdown_text
+
+def store_brief(client_name: str, brief_type: str, markdown_text: str, version: Optional[Tuple] = None) -> None:
+    """Cache a brief under `version` (the data it was built from; defaults to the current one)."""
+    # Empty results are not cached so the next click retries
+    if markdown_text:
+        if version is None:
+            version = data_version(client_name)
+        st.session_state.brief_cache[(client_name.lower(), brief_type)] = (version, markdown_text)
+
 # ---------- Widgets ----------
 def client_picker(clients: List[str]) -> Tuple[str, bool, str]:
     """Returns (target_name, run_clicked, brief_type)."""
@@ -50,7 +84,7 @@ def client_picker(clients: List[str]) -> Tuple[str, bool, str]:
         typed = st.text_input("…or type a name", value="")
 
     with col3:
-        brief_options = ["Select brief type", "Full brief", "Talking points only"]
+        brief_options = ["Select brief type", "Full brief", "Talking points only", "Full brief + talking points"]
         brief_type = st.selectbox(
             "Brief type",
             brief_options,
@@ -69,16 +103,28 @@ def client_picker(clients: List[str]) -> Tuple[str, bool, str]:
     st.caption("Tip: tweak the name if needed (e.g., 'Acme' vs 'Acme Corp').")
     return target, run, brief_type
 
+def latency_slo_picker() -> float:
+    """Seconds to wait for the agent before showing the quick brief (0 = wait for the agent)."""
+    with st.expander("Advanced"):
+        return float(st.number_input(
+            "Latency SLO for full briefs (seconds, 0 = off)",
+            min_value=0.0, max_value=45.0, value=0.0, step=1.0,
+            help="Show a data-only brief at the deadline and swap in the agent's brief when it arrives.",
+        ))
+
 # ---------- Renderers ----------
-def render_brief(markdown_text: str) -> None:
+def render_brief(markdown_text: Optional[str]) -> None:
     if markdown_text:
         st.markdown(markdown_text)
     else:
         st.info("No data found. Try selecting an exact company name from the list.")
 
-def footer(model_name: str) -> None:
+def footer(model_name: str, llm_queue: Optional[Dict[str, Any]] = None) -> None:
     st.divider()
+    queue = ""
+    if llm_queue:
+        queue = f"LLM queue: {llm_queue['queue_depth']} waiting, avg wait {llm_queue['avg_wait_s']:.1f}s · "
     st.caption(
         f"Calls used: {st.session_state.calls_used}/{st.session_state.call_limit} · "
-        f"Model: {model_name} · Local RAG (MiniLM + Chroma)"
+        f"{queue}Model: {model_name} · Local RAG (MiniLM + Chroma)"
     )
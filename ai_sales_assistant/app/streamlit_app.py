@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os
+from typing import Optional
 from dotenv import load_dotenv
 import streamlit as st
 
@@ -21,10 +22,20 @@ from ai_sales_assistant.app.components import (
     bump_calls,
     client_picker,
     render_brief,
+    cached_brief,
+    data_version,
+    store_brief,
+    latency_slo_picker,
     footer,
 )
 
-from ai_sales_assistant.agent.agent import run_brief
+from ai_sales_assistant.agent.agent import (
+    run_brief,
+    run_brief_with_deadline,
+    run_talking_points,
+    run_brief_and_talking_points,
+)
+from ai_sales_assistant.agent.ratelimit import get_limiter
 
 # Load env (works locally). On Streamlit Cloud, prefer st.secrets.
 load_dotenv()
@@ -56,46 +67,75 @@ Generate a full client overview or talking points only — synthesized from rece
 # One-time init
 init_session(limit=20)
 
-# Cache the agent once so "talking points only" can use it
-@st.cache_resource(show_spinner=False)
-def get_executor():
-    from ai_sales_assistant.agent.agent import build_agent
-    return build_agent()
-
-# Wrapper for running talking points only
-def run_talking_points_only(client_name: str) -> str:
-    exec_ = get_executor()
-    q = (
-        f"Prepare a pre-call brief for {client_name}. Include only factual info from tools. "
-        f"Return ONLY the 'Talking points' section as 3-5 concise, professional bullets. "
-        f"Do not include Overview, KPIs, Risks, or References. Avoid repeating raw notes; "
-        f"synthesize next-step discussion items based on recent interactions, KPIs, and open tickets."
-    )
-    result = exec_.invoke({"input": q})
-    return (result.get("output") or "").strip()
+def generate(client_name: str, brief_type: str, slo_s: float = 0.0) -> str:
+    """Compute the requested view(s), fill the session cache and return the requested one."""
+    # Read before generating, so a write made meanwhile invalidates what we cache
+    version = data_version(client_name)
+    if brief_type == "Full brief" and slo_s > 0:
+        md, pending = run_brief_with_deadline(client_name, slo_s)
+        if pending is not None:
+            st.session_state.pending_briefs[(client_name.lower(), brief_type)] = (version, pending)
+    elif brief_type == "Full brief":
+        md = run_brief(client_name)
+    elif brief_type == "Talking points only":
+        md = run_talking_points(client_name)
+    else:
+        both = run_brief_and_talking_points(client_name)
+        # Also cache the single views so switching brief type is instant
+        store_brief(client_name, "Full brief", both["brief"], version)
+        store_brief(client_name, "Talking points only", both["talking_points"], version)
+        if not both["talking_points"]:
+            # Shown once but not cached, so the next click retries the talking points
+            return f"{both['brief']}\n\n#### Talking points\n\n_Not available right now; generate again to retry._"
+        md = f"{both['brief']}\n\n#### Talking points\n\n{both['talking_points']}"
+    store_brief(client_name, brief_type, md, version)
+    return md
+
+@st.fragment(run_every=2)
+def live_brief(client_name: str, brief_type: str) -> None:
+    """Render the cached brief, swapping in the agent's version once its run finishes."""
+    key = (client_name.lower(), brief_type)
+    version, fut = st.session_state.pending_briefs.get(key, (None, None))
+    if fut is not None and fut.done():
+        st.session_state.pending_briefs.pop(key, None)
+        try:
+            store_brief(client_name, brief_type, fut.result(), version)
+        except Exception:
+            pass  # keep the quick brief
+    # Keep showing this run's brief even if the data moved on; the next click regenerates
+    render_brief(cached_brief(client_name, brief_type, check_version=False))
+    if key in st.session_state.pending_briefs:
+        st.caption("⏳ Showing the quick data-only brief; the agent's brief will replace it when ready.")
+
+def show(client_name: str, brief_type: str, fresh: Optional[str] = None) -> None:
+    """Render the cached view, or `fresh` (this run's result) when it was not cacheable."""
+    if (client_name.lower(), brief_type) in st.session_state.pending_briefs:
+        live_brief(client_name, brief_type)
+    else:
+        render_brief(cached_brief(client_name, brief_type, check_version=False) or fresh)
 
 # UI flow
 clients = list_clients(200)
 target, run, brief_type = client_picker(clients)
+slo_s = latency_slo_picker()
 
 placeholder = st.empty()
 if run:
-    if not can_call():
+    if brief_type not in ("Full brief", "Talking points only", "Full brief + talking points"):
+        st.info("Please select a brief type.")
+        st.stop()
+    # Reused only while the client's data is unchanged since it was generated
+    if cached_brief(target, brief_type) is not None:
+        show(target, brief_type)
+    elif not can_call():
         st.warning("Daily demo limit reached. Please try again later.")
     else:
         with st.spinner("Preparing your brief…"):
             try:
-                if brief_type == "Full brief":
-                    md = run_brief(target)
-                    render_brief(md)
-                elif brief_type == "Talking points only":
-                    md = run_talking_points_only(target)
-                    render_brief(md)
-                else:
-                    st.info("Please select a brief type.")
-                    st.stop()
+                md = generate(target, brief_type, slo_s)
+                show(target, brief_type, md)
                 bump_calls()
             except Exception as e:
                 st.error(f"Error: {e}")
 
-footer(MODEL)
+footer(MODEL, get_limiter().stats())
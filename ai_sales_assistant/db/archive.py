@@ -0,0 +1,133 @@
+"""
+Hot/cold split for interactions and tickets.
+
+Old interactions (older than INTERACTIONS_RETENTION_DAYS, except each client's
+newest INTERACTIONS_KEEP_PER_CLIENT) and tickets resolved before
+TICKETS_RETENTION_DAYS are moved into a separate SQLite file
+(local_archive.db next to local.db, or ARCHIVE_DB). The hot tables and their
+indexes then only hold what briefs actually read, which also keeps the
+in-memory snapshot (db/snapshot.py) small. Keeping the newest interactions
+of every client hot means a quiet client's brief still shows its last
+contacts without reading the archive.
+
+Repository reads see the hot tables only, unless called with
+include_archive=True; those queries ATTACH the archive and UNION ALL it in.
+"""
+
+from __future__ import annotations
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / "db" / "archive_schema.sql"
+INTERACTIONS_RETENTION_DAYS = int(os.getenv("ARCHIVE_INTERACTIONS_DAYS", "365"))
+TICKETS_RETENTION_DAYS = int(os.getenv("ARCHIVE_TICKETS_DAYS", "180"))
+# Newest interactions per client that stay hot regardless of age (briefs show up to 5)
+INTERACTIONS_KEEP_PER_CLIENT = int(os.getenv("ARCHIVE_KEEP_INTERACTIONS", "10"))
+# Rows moved per transaction, so the app's readers are never blocked for long
+BATCH_ROWS = 20_000
+
+# table -> (primary key, WHERE clause selecting cold rows; named params :cutoff and :keep)
+_COLD = {
+    "interactions": (
+        "interaction_id",
+        """timestamp < :cutoff AND interaction_id IN (
+             SELECT interaction_id FROM (
+               SELECT interaction_id,
+                      ROW_NUMBER() OVER (PARTITION BY client_id ORDER BY timestamp DESC) AS rn
+               FROM main.interactions
+             ) WHERE rn > :keep
+           )""",
+    ),
+    "tickets": ("ticket_id", "status = 'Resolved' AND resolved_at IS NOT NULL AND resolved_at < :cutoff"),
+}
+
+
+def path_for(db_path: Path | str) -> Path:
+    env = os.getenv("ARCHIVE_DB")
+    if env:
+        return Path(env)
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_archive{db_path.suffix}")
+
+
+def attach(conn: sqlite3.Connection, archive_path: Path, create: bool = False) -> bool:
+    """ATTACH the archive as schema `archive`; False if it does not exist (and create=False)."""
+    if not create and not archive_path.exists():
+        return False
+    conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path),))
+    if create:
+        conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    return True
+
+
+def history_source(table: str, archived: bool) -> str:
+    """FROM-clause source for `table`: the hot table, or hot + archive."""
+    if not archived:
+        return table
+    return f"(SELECT * FROM main.{table} UNION ALL SELECT * FROM archive.{table})"
+
+
+def _cutoff(days: int, now: Optional[datetime] = None) -> str:
+    return ((now or datetime.now()) - timedelta(days=days)).isoformat(timespec="seconds")
+
+
+def move_cold_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    cutoff: str,
+    batch: int = BATCH_ROWS,
+    keep: int = INTERACTIONS_KEEP_PER_CLIENT,
+) -> int:
+    """Move rows of `table` matching its cold predicate into archive.<table>; returns rows moved.
+
+    Each batch is selected, copied and deleted in one write transaction, so a
+    row updated in between (e.g. a reopened ticket) is never archived stale or
+    deleted unarchived. INSERT OR REPLACE makes a rerun after an interrupted
+    batch harmless.
+    """
+    pk, where = _COLD[table]
+    moved = 0
+    while True:
+        with conn:
+            # BEGIN IMMEDIATE: take the write lock before the SELECT, not at the INSERT
+            conn.execute("BEGIN IMMEDIATE")
+            params = {"cutoff": cutoff, "keep": keep, "batch": batch}
+            ids = [r[0] for r in conn.execute(f"SELECT {pk} FROM main.{table} WHERE {where} LIMIT :batch", params)]
+            if not ids:
+                return moved
+            id_json = json.dumps(ids)
+            conn.execute(
+                f"INSERT OR REPLACE INTO archive.{table} "
+                f"SELECT * FROM main.{table} WHERE {pk} IN (SELECT value FROM json_each(?))",
+                (id_json,),
+            )
+            conn.execute(f"DELETE FROM main.{table} WHERE {pk} IN (SELECT value FROM json_each(?))", (id_json,))
+        moved += len(ids)
+
+
+def archive_history(
+    db_path: Path | str,
+    interactions_days: int = INTERACTIONS_RETENTION_DAYS,
+    tickets_days: int = TICKETS_RETENTION_DAYS,
+    now: Optional[datetime] = None,
+    interactions_keep: int = INTERACTIONS_KEEP_PER_CLIENT,
+) -> Dict[str, int]:
+    """Move cold interactions and resolved tickets from db_path into its archive file."""
+    conn = sqlite3.connect(db_path)
+    try:
+        attach(conn, path_for(db_path), create=True)
+        moved = {
+            "interactions": move_cold_rows(
+                conn, "interactions", _cutoff(interactions_days, now), keep=interactions_keep
+            ),
+            "tickets": move_cold_rows(conn, "tickets", _cutoff(tickets_days, now)),
+        }
+        # Refresh planner stats for the now much smaller hot tables
+        conn.execute("PRAGMA main.optimize;")
+    finally:
+        conn.close()
+    return moved
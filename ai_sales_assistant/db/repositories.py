@@ -1,19 +1,50 @@
 from __future__ import annotations
+import json
+import os
 import sqlite3
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ai_sales_assistant.db import archive, snapshot
 
 # Resolve DB path relative to the repository root to avoid CWD issues
 # ai_sales_assistant/db/repositories.py -> parents[0]=db, [1]=ai_sales_assistant, [2]=repo root
 ROOT_DIR = Path(__file__).resolve().parents[2]
 DB_PATH = ROOT_DIR / "local.db"
+# Changelog rows kept by prune_changelog (run after seeding and archiving)
+CHANGELOG_KEEP_ROWS = int(os.getenv("CHANGELOG_KEEP_ROWS", "100000"))
 
-def _conn() -> sqlite3.Connection:
+def _disk_conn() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
+def _conn() -> sqlite3.Connection:
+    """Connection for reads: the in-memory snapshot when enabled, else the file."""
+    try:
+        if snapshot.ENABLED:
+            snapshot.start(DB_PATH)
+        conn = snapshot.connect()
+    except (sqlite3.Error, OSError):
+        # No usable snapshot (yet); its watcher keeps retrying, so read the file meanwhile
+        conn = None
+    if conn is None:
+        return _disk_conn()
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _history_conn(include_archive: bool) -> Tuple[sqlite3.Connection, bool]:
+    """Read connection plus whether the archive is attached to it.
+
+    Archive reads go to disk: the in-memory snapshot holds only the hot tables.
+    """
+    if not include_archive:
+        return _conn(), False
+    conn = _disk_conn()
+    return conn, archive.attach(conn, archive.path_for(DB_PATH))
+
 def client_overview(client_name: str) -> Dict[str, Any] | None:
     q = """
     SELECT client_id, company_name, industry, region, owner_name,
@@ -42,35 +73,215 @@ def kpi_snapshot(client_name: str, months: int = 3) -> List[Dict[str, Any]]:
     # Return in ascending month order for nicer trend calc
     return [dict(r) for r in rows][::-1]
 
-def recent_interactions(client_name: str, limit: int = 5) -> List[Dict[str, Any]]:
-    q = """
+def recent_interactions(client_name: str, limit: int = 5, include_archive: bool = False) -> List[Dict[str, Any]]:
+    conn, archived = _history_conn(include_archive)
+    q = f"""
     WITH tgt AS (
       SELECT client_id FROM clients WHERE company_name LIKE '%' || ? || '%' COLLATE NOCASE LIMIT 1
     )
     SELECT i.timestamp, i.channel, i.owner_name, i.sentiment, i.notes
-    FROM interactions i
+    FROM {archive.history_source("interactions", archived)} i
     JOIN tgt ON tgt.client_id = i.client_id
     ORDER BY i.timestamp DESC
     LIMIT ?
     """
-    with _conn() as c:
+    with conn as c:
         rows = c.execute(q, (client_name, limit)).fetchall()
     return [dict(r) for r in rows]
 
-def open_tickets(client_name: str, status: str | None = None) -> List[Dict[str, Any]]:
-    q = """
+def open_tickets(client_name: str, status: str | None = None, include_archive: bool = False) -> List[Dict[str, Any]]:
+    conn, archived = _history_conn(include_archive)
+    q = f"""
     WITH tgt AS (
       SELECT client_id FROM clients WHERE company_name LIKE '%' || ? || '%' COLLATE NOCASE LIMIT 1
     )
-    SELECT t.ticket_id, t.category, t.status, t.opened_at, t.resolved_at, t.resolution_time_days, t.priority
-    FROM tickets t
+    SELECT t.ticket_id, t.category, t.status, t.opened_at, t.resolved_at, t.resolution_time_days, t.priority,
+           CASE t.status WHEN 'Open' THEN 0 WHEN 'Pending' THEN 1 ELSE 2 END AS status_rank
+    FROM {archive.history_source("tickets", archived)} t
     JOIN tgt ON tgt.client_id = t.client_id
     WHERE (? IS NULL OR t.status = ?)
+    -- Sort on result columns: an expression over the UNION ALL source would make
+    -- SQLite materialize both whole tables instead of searching each by client_id
+    ORDER BY status_rank, t.opened_at DESC
+    """
+    params = (client_name, status, status)
+    with conn as c:
+        rows = c.execute(q, params).fetchall()
+    return [{k: r[k] for k in r.keys() if k != "status_rank"} for r in rows]
+
+def interactions_by_ids(interaction_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """Fetch interactions by primary key, preserving the order of `interaction_ids`."""
+    ids = [int(i) for i in interaction_ids]
+    q = """
+    SELECT i.interaction_id, i.client_id, i.timestamp, i.channel, i.owner_name, i.sentiment, i.notes
+    FROM interactions i
+    WHERE i.interaction_id IN (SELECT value FROM json_each(?))
+    """
+    with _conn() as c:
+        rows = {r["interaction_id"]: dict(r) for r in c.execute(q, (json.dumps(ids),)).fetchall()}
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        # The interaction-notes index keeps archived interactions; look those up in the archive
+        conn, archived = _history_conn(include_archive=True)
+        if archived:
+            with conn as c:
+                cur = c.execute(q.replace("FROM interactions i", "FROM archive.interactions i"), (json.dumps(missing),))
+                rows.update((r["interaction_id"], dict(r)) for r in cur.fetchall())
+        conn.close()
+    return [rows[i] for i in ids if i in rows]
+
+def client_freshness(client_name: str) -> Dict[str, Any] | None:
+    """Cheap fingerprint of everything fetch_context reads for a client (index lookups only).
+
+    Max row timestamps per table catch appends, the open-ticket count catches
+    status changes, and the client_versions entry catches any other write.
+    """
+    q = """
+    WITH tgt AS (
+      SELECT client_id FROM clients WHERE company_name LIKE '%' || ? || '%' COLLATE NOCASE LIMIT 1
+    )
+    SELECT tgt.client_id,
+      (SELECT v.version FROM client_versions v WHERE v.client_id = tgt.client_id) AS version,
+      (SELECT MAX(m.month) FROM metrics m WHERE m.client_id = tgt.client_id) AS max_month,
+      (SELECT MAX(i.timestamp) FROM interactions i WHERE i.client_id = tgt.client_id) AS max_interaction,
+      (SELECT MAX(t.opened_at) FROM tickets t WHERE t.client_id = tgt.client_id) AS max_ticket_opened,
+      (SELECT MAX(t.resolved_at) FROM tickets t WHERE t.client_id = tgt.client_id) AS max_ticket_resolved,
+      (SELECT COUNT(*) FROM tickets t
+        WHERE t.client_id = tgt.client_id AND t.status IN ('Open', 'Pending')) AS open_tickets
+    FROM tgt
+    """
+    with _conn() as c:
+        r = c.execute(q, (client_name,)).fetchone()
+    return dict(r) if r else None
+
+# ---------- Bulk variants: many clients per query ----------
+# Select clients by id list or by owner; each function runs one set-based query
+# and streams (client_id, rows) pairs in client_id order. Clients with no
+# matching rows are skipped.
+def _targets(client_ids: Optional[Iterable[int]], owner_name: Optional[str]) -> Tuple[str, list]:
+    if client_ids is not None:
+        return "SELECT value AS client_id FROM json_each(?)", [json.dumps([int(i) for i in client_ids])]
+    if owner_name is not None:
+        return "SELECT client_id FROM clients WHERE owner_name = ?", [owner_name]
+    raise ValueError("Pass client_ids or owner_name")
+
+def _stream(q: str, params: Sequence[Any], batch: int = 500) -> Iterator[sqlite3.Row]:
+    conn = _conn()
+    try:
+        cur = conn.execute(q, params)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        conn.close()
+
+def _grouped(rows: Iterator[sqlite3.Row]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    for client_id, group in groupby(rows, key=lambda r: r["client_id"]):
+        yield client_id, [{k: r[k] for k in r.keys() if k not in ("client_id", "rn")} for r in group]
+
+def client_overviews(client_ids: Optional[Iterable[int]] = None, owner_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    tgt, params = _targets(client_ids, owner_name)
+    q = f"""
+    SELECT c.client_id, c.company_name, c.industry, c.region, c.owner_name,
+           c.lifecycle_stage, c.deal_stage, c.lifetime_value, c.created_at
+    FROM clients c
+    WHERE c.client_id IN ({tgt})
+    ORDER BY c.client_id
+    """
+    return (dict(r) for r in _stream(q, params))
+
+def kpi_snapshot_many(
+    client_ids: Optional[Iterable[int]] = None, owner_name: Optional[str] = None, months: int = 3
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Last `months` metrics rows per client, ascending by month (as kpi_snapshot)."""
+    tgt, params = _targets(client_ids, owner_name)
+    q = f"""
+    SELECT * FROM (
+      SELECT m.client_id, m.month, m.spend, m.satisfaction_score, m.churn_risk, m.open_tickets, m.renewal_due,
+             ROW_NUMBER() OVER (PARTITION BY m.client_id ORDER BY m.month DESC) AS rn
+      FROM metrics m
+      WHERE m.client_id IN ({tgt})
+    )
+    WHERE rn <= ?
+    ORDER BY client_id, month
+    """
+    return _grouped(_stream(q, [*params, months]))
+
+def recent_interactions_many(
+    client_ids: Optional[Iterable[int]] = None, owner_name: Optional[str] = None, limit: int = 5
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Latest `limit` interactions per client, newest first (as recent_interactions)."""
+    tgt, params = _targets(client_ids, owner_name)
+    q = f"""
+    SELECT * FROM (
+      SELECT i.client_id, i.timestamp, i.channel, i.owner_name, i.sentiment, i.notes,
+             ROW_NUMBER() OVER (PARTITION BY i.client_id ORDER BY i.timestamp DESC) AS rn
+      FROM interactions i
+      WHERE i.client_id IN ({tgt})
+    )
+    WHERE rn <= ?
+    ORDER BY client_id, rn
+    """
+    return _grouped(_stream(q, [*params, limit]))
+
+def open_tickets_many(
+    client_ids: Optional[Iterable[int]] = None,
+    owner_name: Optional[str] = None,
+    statuses: Optional[Iterable[str]] = ("Open", "Pending"),
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Tickets per client in `statuses` (None = all), ordered as open_tickets."""
+    tgt, params = _targets(client_ids, owner_name)
+    status_list = None if statuses is None else json.dumps(list(statuses))
+    q = f"""
+    SELECT t.client_id, t.ticket_id, t.category, t.status, t.opened_at, t.resolved_at,
+           t.resolution_time_days, t.priority
+    FROM tickets t
+    WHERE t.client_id IN ({tgt})
+      AND (? IS NULL OR t.status IN (SELECT value FROM json_each(?)))
     ORDER BY
+      t.client_id,
       CASE t.status WHEN 'Open' THEN 0 WHEN 'Pending' THEN 1 ELSE 2 END,
       t.opened_at DESC
     """
-    params = (client_name, status, status)
-    with _conn() as c:
-        rows = c.execute(q, params).fetchall()
-    return [dict(r) for r in rows]
+    return _grouped(_stream(q, [*params, status_list, status_list]))
+
+# ---------- Change-data-capture (see changelog / client_versions in schema.sql) ----------
+# Always read from disk: these are the freshness signal, so a snapshot must not lag them.
+def latest_version() -> int:
+    """Highest changelog seq; a cache can remember this and later ask what changed."""
+    with _disk_conn() as c:
+        (v,) = c.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog").fetchone()
+    return int(v)
+
+def client_versions_since(since: int) -> Dict[int, int]:
+    """client_id -> current version for every client changed after changelog seq `since`.
+
+    Read from client_versions, which holds each client's latest seq, so the
+    answer stays exact after old changelog rows are pruned.
+    """
+    with _disk_conn() as c:
+        rows = c.execute("SELECT client_id, version FROM client_versions WHERE version > ?", (since,)).fetchall()
+    return {r["client_id"]: r["version"] for r in rows}
+
+def client_versions(client_ids: Iterable[int]) -> Dict[int, int]:
+    """Current version per client (0 if it was never written after the triggers existed)."""
+    ids = list(client_ids)
+    q = "SELECT client_id, version FROM client_versions WHERE client_id IN (SELECT value FROM json_each(?))"
+    with _disk_conn() as c:
+        rows = c.execute(q, (json.dumps(ids),)).fetchall()
+    found = {r["client_id"]: r["version"] for r in rows}
+    return {cid: found.get(cid, 0) for cid in ids}
+
+def prune_changelog(keep: int = CHANGELOG_KEEP_ROWS, db_path: Path | str | None = None) -> int:
+    """Drop all but the newest `keep` changelog rows; returns how many were dropped."""
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        with conn:
+            n = conn.execute(
+                "DELETE FROM changelog WHERE seq <= (SELECT MAX(seq) FROM changelog) - ?", (keep,)
+            ).rowcount
+    finally:
+        conn.close()
+    return n
@@ -0,0 +1,108 @@
+"""
+Optional in-memory read snapshot of local.db.
+
+When enabled (DB_SNAPSHOT=1, or snapshot.start()), the on-disk database is
+copied with SQLite's backup API into a named shared-cache in-memory database,
+and repository reads connect to that instead of the file. A daemon thread
+watches the file's mtime (plus an optional max age) and builds a fresh copy
+under a new name, then swaps the URI under a lock: readers never see a
+half-loaded copy, and in-flight queries keep the previous generation alive
+through their own connection until they finish.
+"""
+
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+ENABLED = os.getenv("DB_SNAPSHOT", "0") == "1"
+# Seconds between checks of the DB file's mtime
+POLL_S = float(os.getenv("DB_SNAPSHOT_POLL", "2"))
+# Reload at least this often even without a visible file change (0 = never)
+MAX_AGE_S = float(os.getenv("DB_SNAPSHOT_MAX_AGE", "0"))
+
+_lock = threading.Lock()
+_start_lock = threading.Lock()
+_state = {"uri": None, "keeper": None, "db_path": None, "mtime": None, "loaded_at": 0.0, "gen": 0}
+_thread: Optional[threading.Thread] = None
+
+
+def _file_mtime(db_path: Path) -> tuple:
+    # Include the WAL/journal files so committed-but-not-checkpointed writes count
+    out = []
+    for suffix in ("", "-wal", "-journal"):
+        try:
+            out.append(os.stat(f"{db_path}{suffix}").st_mtime_ns)
+        except FileNotFoundError:
+            out.append(0)
+    return tuple(out)
+
+
+def refresh() -> None:
+    """Build a new snapshot generation from disk and switch readers to it."""
+    db_path = _state["db_path"]
+    mtime = _file_mtime(db_path)
+    gen = _state["gen"] + 1
+    uri = f"file:ai_sales_snapshot_{os.getpid()}_{gen}?mode=memory&cache=shared"
+    keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    try:
+        src = sqlite3.connect(db_path)
+        try:
+            src.backup(keeper)
+        finally:
+            src.close()
+    except BaseException:
+        keeper.close()
+        raise
+    with _lock:
+        old = _state["keeper"]
+        _state.update(uri=uri, keeper=keeper, mtime=mtime, loaded_at=time.monotonic(), gen=gen)
+    if old is not None:
+        old.close()
+
+
+def _watch() -> None:
+    while True:
+        time.sleep(POLL_S)
+        try:
+            stale = _file_mtime(_state["db_path"]) != _state["mtime"]
+            expired = MAX_AGE_S > 0 and time.monotonic() - _state["loaded_at"] >= MAX_AGE_S
+            if stale or expired:
+                refresh()
+        except Exception:
+            # Keep serving the last good snapshot; try again next tick
+            pass
+
+
+def start(db_path: Path | str) -> None:
+    """Load the first snapshot (blocking) and start the refresh thread; idempotent.
+
+    If the first load fails the error propagates, but the thread still
+    starts and retries every POLL_S; connect() returns None until then.
+    """
+    global _thread
+    with _start_lock:
+        if _thread is not None:
+            return
+        _state["db_path"] = Path(db_path)
+        _thread = threading.Thread(target=_watch, name="db-snapshot", daemon=True)
+        try:
+            refresh()
+        finally:
+            _thread.start()
+
+
+def connect() -> Optional[sqlite3.Connection]:
+    """Read-only connection to the current snapshot, or None if not running."""
+    # Connect under the lock: once connected, a swap cannot drop the generation
+    # (closing its keeper) between reading the URI and opening it
+    with _lock:
+        uri = _state["uri"]
+        if uri is None:
+            return None
+        conn = sqlite3.connect(uri, uri=True)
+    conn.execute("PRAGMA query_only=ON;")
+    return conn
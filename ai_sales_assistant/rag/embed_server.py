@@ -0,0 +1,269 @@
+"""
+Shared embedding server over a Unix socket, plus its client.
+
+One process loads the sentence-transformers model and serves every app worker
+(see scripts/embed_server.py). Requests arriving within MAX_WAIT_MS of each
+other are merged into one model call of up to MAX_BATCH texts, so concurrent
+single-query searches run as a batch instead of one by one.
+
+Wire format, both directions: two big-endian uint32 lengths (JSON header,
+binary payload), then the header and payload. Requests carry {"texts": [...]}
+and no payload; replies carry {"shape": [n, dim]} and float32 vectors, or
+{"error": "..."}.
+
+RemoteEmbeddings implements LangChain's Embeddings interface. When the socket
+is missing or the server dies it uses the in-process `fallback` model and
+tries the socket again after RETRY_S.
+"""
+
+from __future__ import annotations
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+SOCKET_PATH = os.getenv("EMBED_SOCKET")  # e.g. /tmp/ai_sales_embed.sock
+MODEL_NAME = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+REQUEST_TIMEOUT_S = float(os.getenv("EMBED_TIMEOUT_S", "120"))
+RETRY_S = float(os.getenv("EMBED_RETRY_S", "30"))
+# Large client requests (index builds) are sent in slices of this many texts
+CLIENT_CHUNK = 512
+
+log = logging.getLogger(__name__)
+
+_FRAME = struct.Struct(">II")
+
+
+def supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("embedding socket closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def _send(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    head = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(head), len(payload)) + head + payload)
+
+
+def _recv(sock: socket.socket):
+    head_len, payload_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, head_len))
+    return header, _recv_exact(sock, payload_len) if payload_len else b""
+
+
+# ---------------------------------------------------------------- server
+
+class _Job:
+    __slots__ = ("texts", "done", "result", "error")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+
+
+class MicroBatcher:
+    """Collects jobs from handler threads and runs them through the model together."""
+
+    def __init__(self, embed: Callable[[List[str]], List[List[float]]],
+                 max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        self.embed = embed
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.jobs: "queue.Queue[_Job]" = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        threading.Thread(target=self._loop, name="embed-batcher", daemon=True).start()
+
+    def submit(self, texts: List[str]) -> np.ndarray:
+        job = _Job(texts)
+        self.jobs.put(job)
+        job.done.wait()
+        if job.error:
+            raise RuntimeError(job.error)
+        return job.result
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self.jobs.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    job = self.jobs.get(timeout=left)
+                except queue.Empty:
+                    break
+                batch.append(job)
+                size += len(job.texts)
+            self._run(batch)
+
+    def _run(self, batch: List[_Job]) -> None:
+        texts = [t for job in batch for t in job.texts]
+        try:
+            vectors = np.asarray(self.embed(texts), dtype=np.float32)
+        except Exception as e:
+            for job in batch:
+                job.error = f"{type(e).__name__}: {e}"
+                job.done.set()
+            return
+        self.batches += 1
+        self.texts += len(texts)
+        start = 0
+        for job in batch:
+            job.result = vectors[start:start + len(job.texts)]
+            start += len(job.texts)
+            job.done.set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        batcher: MicroBatcher = self.server.batcher  # type: ignore[attr-defined]
+        while True:
+            try:
+                header, _ = _recv(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                vectors = batcher.submit([str(t) for t in header.get("texts") or []])
+                _send(self.request, {"shape": list(vectors.shape)}, vectors.tobytes())
+            except Exception as e:
+                _send(self.request, {"error": str(e)})
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Every app worker thread may connect at once; the default backlog of 5 refuses them
+    request_queue_size = 128
+
+
+def serve(socket_path: str, model_name: str = MODEL_NAME,
+          max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS) -> None:
+    """Load the model and serve embeddings on `socket_path` until interrupted."""
+    if not supported():
+        raise RuntimeError("Unix sockets are not available on this platform")
+    if os.path.exists(socket_path):
+        if available(socket_path):
+            raise RuntimeError(f"An embedding server is already listening on {socket_path}")
+        os.unlink(socket_path)  # stale file from a crashed server
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    model = HuggingFaceEmbeddings(model_name=model_name)
+    model.embed_documents(["warmup"])
+
+    server = _Server(socket_path, _Handler)
+    server.batcher = MicroBatcher(model.embed_documents, max_batch, max_wait_ms)  # type: ignore[attr-defined]
+    os.chmod(socket_path, 0o660)
+    print(f"[embed] serving {model_name} on {socket_path} (batch ≤{max_batch}, wait {max_wait_ms:g} ms)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# ---------------------------------------------------------------- client
+
+def available(socket_path: Optional[str]) -> bool:
+    """True if something accepts connections on `socket_path`."""
+    if not socket_path or not supported() or not os.path.exists(socket_path):
+        return False
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.settimeout(1.0)
+        s.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings served by embed_server, with an optional in-process fallback."""
+
+    def __init__(self, socket_path: str, fallback: Optional[Callable[[], Embeddings]] = None,
+                 timeout: float = REQUEST_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._fallback_factory = fallback
+        self._fallback: Optional[Embeddings] = None
+        self._fallback_lock = threading.Lock()
+        self._local = threading.local()  # one connection per thread
+        self._down_until = 0.0
+
+    def _conn(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _drop(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _remote(self, texts: List[str]) -> List[List[float]]:
+        out: List[List[float]] = []
+        for i in range(0, len(texts), CLIENT_CHUNK):
+            sock = self._conn()
+            _send(sock, {"texts": texts[i:i + CLIENT_CHUNK]})
+            header, payload = _recv(sock)
+            if "error" in header:
+                raise RuntimeError(f"embedding server: {header['error']}")
+            out.extend(np.frombuffer(payload, dtype=np.float32).reshape(header["shape"]).tolist())
+        return out
+
+    def _local_model(self) -> Embeddings:
+        with self._fallback_lock:
+            if self._fallback is None:
+                self._fallback = self._fallback_factory()
+            return self._fallback
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if supported() and time.monotonic() >= self._down_until:
+            try:
+                return self._remote(list(texts))
+            except (OSError, ConnectionError):
+                self._drop()
+                if self._fallback_factory is None:
+                    raise
+                self._down_until = time.monotonic() + RETRY_S
+                log.warning(
+                    "embedding server at %s unreachable; using in-process model for %gs", self.socket_path, RETRY_S
+                )
+        elif self._fallback_factory is None:
+            raise ConnectionError(f"embedding server at {self.socket_path} unavailable")
+        return self._local_model().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,174 @@
+"""
+Note chunking and incremental index updates.
+
+Shared by scripts/build_vectorstore.py (full build) and scripts/watch_notes.py
+(live upserts). Every write moves the index directory's stamp: for the npy
+backend that is the published manifest itself (see npy_index), for Chroma an
+`index.version` file. The retriever checks the stamp before each search and
+reopens the index when it moved, so running apps pick up changes without a
+restart.
+"""
+
+from __future__ import annotations
+import os
+import re
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+NOTES_DIR = Path("data/meeting_notes")
+STAMP_FILE = "index.version"
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 120
+
+# Written by demo_generate_data.synth_note_text, e.g. "Date: 2025-07-14"
+_DATE_RE = re.compile(r"^Date:\s*(\d{4}-\d{2}-\d{2})", re.MULTILINE)
+# Note files are named "<company_slug>_<n>.txt"
+_FILE_RE = re.compile(r"^(?P<client>.+?)(?:_\d+)?$")
+
+
+def client_slug(name: str) -> str:
+    """Same normalization demo_generate_data uses for note filenames."""
+    return name.lower().replace(" ", "_").replace(".", "")
+
+
+def note_date(text: str) -> str | None:
+    m = _DATE_RE.search(text)
+    return m.group(1) if m else None
+
+
+def note_metadata(path: Path, text: str) -> Dict:
+    """Per-chunk metadata: source path, client slug and note date.
+
+    `date_ord` (days since epoch) duplicates `date` as an int so Chroma's
+    numeric `$gte` filter can apply a time window.
+    """
+    meta: Dict = {"source": str(path), "client": _FILE_RE.match(Path(path).stem).group("client")}
+    d = note_date(text)
+    if d:
+        meta["date"] = d
+        meta["date_ord"] = date.fromisoformat(d).toordinal() - date(1970, 1, 1).toordinal()
+    return meta
+
+
+def split_note(path: Path) -> Tuple[List[str], List[Dict]]:
+    """Chunk one note file; returns (texts, metadatas)."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    raw = Path(path).read_text(encoding="utf-8").strip()
+    chunks = splitter.split_text(raw)
+    meta = note_metadata(path, raw)
+    return chunks, [dict(meta) for _ in chunks]
+
+
+def split_notes(paths: Iterable[Path]) -> Tuple[List[str], List[Dict]]:
+    texts, metas = [], []
+    for p in paths:
+        t, m = split_note(p)
+        texts.extend(t)
+        metas.extend(m)
+    return texts, metas
+
+
+def stamp(index_dir: Path | str) -> int:
+    """Current version stamp of an index directory (0 if never stamped).
+
+    An npy manifest is replaced (new inode) on every publish, so its identity
+    changes exactly when a new generation becomes visible.
+    """
+    from ai_sales_assistant.rag.npy_index import MANIFEST_FILE
+
+    try:
+        st = os.stat(Path(index_dir) / MANIFEST_FILE)
+        return hash((st.st_ino, st.st_mtime_ns)) or 1
+    except FileNotFoundError:
+        pass
+    try:
+        return os.stat(Path(index_dir) / STAMP_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_stamp(index_dir: Path | str) -> None:
+    p = Path(index_dir) / STAMP_FILE
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(str(time.time_ns()), encoding="utf-8")
+
+
+def upsert_chroma(vs, changed: List[Path], removed: List[Path], persist_dir: Path | str) -> int:
+    """Replace the chunks of `changed` files and drop those of `removed` ones."""
+    for p in [*changed, *removed]:
+        vs.delete(where={"source": str(p)})
+    texts, metas = split_notes(changed)
+    if texts:
+        vs.add_texts(texts=texts, metadatas=metas)
+    bump_stamp(persist_dir)
+    return len(texts)
+
+
+def upsert_npy(index_dir: Path | str, embeddings, changed: List[Path], removed: List[Path]) -> int:
+    """Publish a new npy generation with the chunks of `changed`/`removed` files replaced.
+
+    Only the changed files are embedded and written, as one new segment;
+    existing segments are left in place (see npy_index.upsert).
+    """
+    import numpy as np
+    from ai_sales_assistant.rag.npy_index import upsert
+
+    texts, metas = split_notes(changed)
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32) if texts else np.empty((0, 0), np.float32)
+    upsert(index_dir, vectors, texts, metas, [str(p) for p in [*changed, *removed]])
+    return len(texts)
+
+
+def index_interactions(
+    rows: List[Dict], embeddings, backend: str, npy_dir: Path | str, chroma_dir: Path | str, collection: str
+) -> int:
+    """(Re)build the interaction-notes index from interactions rows.
+
+    Identical note texts are embedded once. In the npy layout `source` holds
+    the interaction_id and `client` the client_id, so per-client lookups scan
+    a single partition; Chroma uses the interaction_id as document id.
+    """
+    rows = [r for r in rows if (r.get("notes") or "").strip()]
+    uniq = sorted({r["notes"].strip() for r in rows})
+    vecs = dict(zip(uniq, embeddings.embed_documents(uniq))) if uniq else {}
+    texts = [r["notes"].strip() for r in rows]
+    metas = [
+        {
+            "source": str(r["interaction_id"]),
+            "client": str(r["client_id"]),
+            "date": str(r["timestamp"])[:10],
+        }
+        for r in rows
+    ]
+
+    if backend == "npy":
+        import numpy as np
+        from ai_sales_assistant.rag.npy_index import write_index
+
+        dim = len(next(iter(vecs.values()))) if vecs else 0
+        matrix = np.asarray([vecs[t] for t in texts], dtype=np.float32).reshape(len(texts), dim)
+        write_index(npy_dir, matrix, texts, metas)
+    else:
+        import chromadb
+        from chromadb.config import Settings
+
+        client = chromadb.PersistentClient(path=str(chroma_dir), settings=Settings(anonymized_telemetry=False))
+        try:
+            client.delete_collection(collection)
+        except ValueError:  # first build: nothing to drop
+            pass
+        col = client.create_collection(collection, metadata={"hnsw:space": "cosine"})
+        step = 5000  # stay under Chroma's max batch size
+        for i in range(0, len(texts), step):
+            col.add(
+                ids=[m["source"] for m in metas[i:i + step]],
+                embeddings=[list(vecs[t]) for t in texts[i:i + step]],
+                documents=texts[i:i + step],
+                metadatas=[{"client_id": int(m["client"]), "date": m["date"]} for m in metas[i:i + step]],
+            )
+        bump_stamp(chroma_dir)
+    return len(uniq)
@@ -0,0 +1,455 @@
+"""
+Memory-mapped NumPy vector index for the meeting-notes corpus.
+
+An index directory holds immutable segments and a manifest naming the live ones:
+  manifest.json   {"quantized": bool, "segments": [{"name": "seg-...", "dropped": [source, ...]}]}
+  seg-<id>/
+    vectors.npy   float32 (N, D), L2-normalized rows
+    meta.npy      structured array, one record per row (text, source, client, date)
+    part_keys.npy, part_bounds.npy   sorted client slugs and their row ranges
+    sources.npy   distinct sources in the segment
+    vectors_q8.npy, scales.npy   optional int8 copy with a per-row float32 scale
+
+Within a segment rows are stored sorted by (client, date), so a client's notes
+are one contiguous slice and a date window inside it is a binary search away.
+Opening an index maps all files read-only, so startup is a couple of mmap()
+calls and every worker process on the host shares the same page cache.
+Search is exact: one matrix-vector product over the selected rows plus a
+partial sort, per segment. With the int8 copy the scan reads a quarter of the
+bytes and only the top candidates are rescored against the float32 rows.
+
+Published segments are never rewritten. An update (`upsert`) writes only the
+new rows as a fresh segment, lists the replaced or deleted sources under
+`dropped` for the older segments, and publishes by atomically replacing
+manifest.json, so a reader always sees one whole generation. Small segments
+are merged once there are more than MAX_SEGMENTS. Segments that drop out of
+the manifest are deleted GC_GRACE_S seconds later, once no reader can still
+be opening them. A directory without a manifest (the older flat layout) is
+read as a single segment.
+"""
+
+from __future__ import annotations
+import json
+import os
+import shutil
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+META_FILE = "meta.npy"
+PART_KEYS_FILE = "part_keys.npy"
+PART_BOUNDS_FILE = "part_bounds.npy"
+Q8_FILE = "vectors_q8.npy"
+SCALES_FILE = "scales.npy"
+SOURCES_FILE = "sources.npy"
+MANIFEST_FILE = "manifest.json"
+META_FIELDS = ("text", "source", "client", "date")
+# Rows quantized per step when writing the int8 copy
+BLOCK_ROWS = 65536
+# Rows dequantized per step during a scan; the float32 scratch block
+# (SCAN_BLOCK_ROWS x D) should stay cache-resident, or int8 loses to float32
+SCAN_BLOCK_ROWS = int(os.getenv("NPY_SCAN_BLOCK_ROWS", "4096"))
+# Candidates kept per requested hit before recency re-ranking
+RECENCY_POOL = 4
+# Merge small segments once an index has more than this many
+MAX_SEGMENTS = int(os.getenv("NPY_MAX_SEGMENTS", "8"))
+# Also merge the largest segment once this share of its rows is dropped
+MAX_DROPPED_SHARE = 0.25
+# How long a retired segment stays on disk for readers still opening it
+GC_GRACE_S = float(os.getenv("NPY_GC_GRACE_S", "300"))
+# Segment name used for the older flat layout (files directly in index_dir)
+_FLAT = "."
+_FLAT_FILES = (VECTORS_FILE, META_FILE, PART_KEYS_FILE, PART_BOUNDS_FILE, Q8_FILE, SCALES_FILE)
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (codes, scales)."""
+    v = normalize(vectors)
+    scales = np.abs(v).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(v / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _meta_array(texts: Sequence[str], metas: Sequence[Dict]) -> np.ndarray:
+    # Fixed-width unicode fields keep the sidecar mmap-able (no pickled objects)
+    cols = {
+        "text": list(texts),
+        **{f: [str(m.get(f) or "") for m in metas] for f in META_FIELDS[1:]},
+    }
+    dtype = [(f, f"<U{max((len(v) for v in cols[f]), default=1) or 1}") for f in META_FIELDS]
+    meta = np.empty(len(texts), dtype=dtype)
+    for f in META_FIELDS:
+        meta[f] = cols[f]
+    return meta
+
+
+def meta_rows(meta: np.ndarray, rows: np.ndarray | slice = slice(None)) -> List[Dict]:
+    """Metadata dicts (without text) for the given rows, e.g. to carry them into a rewrite."""
+    names = [f for f in META_FIELDS[1:] if f in (meta.dtype.names or ())]
+    return [{f: str(r[f]) for f in names} for r in meta[rows]]
+
+
+def _save_atomic(path: Path, arr: np.ndarray) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, arr, allow_pickle=False)
+    os.replace(tmp, path)
+
+
+# ----- manifest -----
+def read_manifest(index_dir: Path | str) -> Dict:
+    """The published generation; an empty index if nothing was written yet."""
+    index_dir = Path(index_dir)
+    try:
+        return json.loads((index_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        pass
+    if (index_dir / VECTORS_FILE).exists():
+        return {"quantized": (index_dir / Q8_FILE).exists(), "segments": [{"name": _FLAT, "dropped": []}]}
+    return {"quantized": False, "segments": []}
+
+
+def _publish(index_dir: Path, old: Dict, segments: List[Dict], quantized: bool) -> None:
+    now = time.time()
+    live = {s["name"] for s in segments}
+    retired = {n: t for n, t in old.get("retired", {}).items() if n not in live}
+    for s in old["segments"]:
+        if s["name"] not in live:
+            retired.setdefault(s["name"], now)
+    expired = [n for n, t in retired.items() if now - t >= GC_GRACE_S]
+    manifest = {
+        "quantized": quantized,
+        "segments": segments,
+        "retired": {n: t for n, t in retired.items() if n not in expired},
+    }
+    tmp = index_dir / (MANIFEST_FILE + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    os.replace(tmp, index_dir / MANIFEST_FILE)
+    for name in expired:
+        if name == _FLAT:
+            for f in _FLAT_FILES:
+                (index_dir / f).unlink(missing_ok=True)
+        else:
+            shutil.rmtree(index_dir / name, ignore_errors=True)
+
+
+# ----- writers -----
+def _quantize_dir(seg_dir: Path) -> None:
+    vectors = np.load(seg_dir / VECTORS_FILE, mmap_mode="r", allow_pickle=False)
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    scales = np.empty(vectors.shape[0], dtype=np.float32)
+    for start in range(0, vectors.shape[0], BLOCK_ROWS):
+        end = start + BLOCK_ROWS
+        codes[start:end], scales[start:end] = quantize_int8(vectors[start:end])
+    _save_atomic(seg_dir / SCALES_FILE, scales)
+    _save_atomic(seg_dir / Q8_FILE, codes)
+
+
+def _write_segment(
+    index_dir: Path, vectors: np.ndarray, texts: Sequence[str], metas: Sequence[Dict], quantized: bool
+) -> str:
+    """Write rows into a new, not yet published segment directory; returns its name."""
+    if len(vectors) != len(texts) or len(texts) != len(metas):
+        raise ValueError("vectors, texts and metas must have the same length")
+    name = f"seg-{time.time_ns():x}-{os.getpid()}"
+    seg_dir = index_dir / name
+    seg_dir.mkdir(parents=True)
+    meta = _meta_array(texts, metas)
+    order = np.lexsort((meta["date"], meta["client"]))
+    meta = meta[order]
+    keys, starts = np.unique(meta["client"], return_index=True)
+    bounds = np.append(starts, len(meta)).astype(np.int64)
+    np.save(seg_dir / META_FILE, meta, allow_pickle=False)
+    np.save(seg_dir / PART_KEYS_FILE, keys, allow_pickle=False)
+    np.save(seg_dir / PART_BOUNDS_FILE, bounds, allow_pickle=False)
+    np.save(seg_dir / SOURCES_FILE, np.unique(meta["source"]), allow_pickle=False)
+    np.save(seg_dir / VECTORS_FILE, normalize(vectors)[order], allow_pickle=False)
+    if quantized:
+        _quantize_dir(seg_dir)
+    return name
+
+
+def write_index(
+    index_dir: Path | str,
+    vectors: np.ndarray,
+    texts: Sequence[str],
+    metas: Sequence[Dict],
+    quantized: Optional[bool] = None,
+) -> None:
+    """Publish `vectors` plus metadata as the whole index, replacing any previous generation.
+
+    `quantized` adds the int8 copy; None keeps whatever the index had.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    old = read_manifest(index_dir)
+    quantized = old["quantized"] if quantized is None else quantized
+    name = _write_segment(index_dir, vectors, texts, metas, quantized)
+    _publish(index_dir, old, [{"name": name, "dropped": []}], quantized)
+
+
+def write_quantized(index_dir: Path | str) -> None:
+    """Add the int8 copy to an existing index, derived from its float32 rows."""
+    index_dir = Path(index_dir)
+    old = read_manifest(index_dir)
+    for s in old["segments"]:
+        if not (index_dir / s["name"] / Q8_FILE).exists():
+            _quantize_dir(index_dir / s["name"])
+    _publish(index_dir, old, old["segments"], True)
+
+
+def _sources(seg_dir: Path) -> np.ndarray:
+    if (seg_dir / SOURCES_FILE).exists():
+        return np.load(seg_dir / SOURCES_FILE, allow_pickle=False)
+    return np.unique(np.load(seg_dir / META_FILE, mmap_mode="r", allow_pickle=False)["source"])
+
+
+def _live_rows(seg_dir: Path, dropped: Sequence[str]) -> np.ndarray:
+    meta = np.load(seg_dir / META_FILE, mmap_mode="r", allow_pickle=False)
+    if not dropped:
+        return np.arange(len(meta))
+    return np.flatnonzero(~np.isin(meta["source"], list(dropped)))
+
+
+def _merge(index_dir: Path, segments: List[Dict], quantized: bool) -> str:
+    """Copy the live rows of `segments` into one new segment (no re-embedding)."""
+    vecs, texts, metas = [], [], []
+    for s in segments:
+        seg_dir = index_dir / s["name"]
+        rows = _live_rows(seg_dir, s["dropped"])
+        meta = np.load(seg_dir / META_FILE, mmap_mode="r", allow_pickle=False)
+        vecs.append(np.asarray(np.load(seg_dir / VECTORS_FILE, mmap_mode="r", allow_pickle=False)[rows]))
+        texts.extend(str(t) for t in meta["text"][rows])
+        metas.extend(meta_rows(meta, rows))
+    return _write_segment(index_dir, np.concatenate(vecs), texts, metas, quantized)
+
+
+def _compact(index_dir: Path, segments: List[Dict], quantized: bool) -> List[Dict]:
+    """Merge all but the largest segment, and that one too once it is mostly stale."""
+    if len(segments) <= MAX_SEGMENTS:
+        return segments
+    sizes = [
+        (len(_live_rows(index_dir / s["name"], s["dropped"])), len(_live_rows(index_dir / s["name"], [])))
+        for s in segments
+    ]
+    big = max(range(len(segments)), key=lambda i: sizes[i][1])
+    live, total = sizes[big]
+    if total and 1 - live / total > MAX_DROPPED_SHARE:
+        return [{"name": _merge(index_dir, segments, quantized), "dropped": []}]
+    rest = [s for i, s in enumerate(segments) if i != big]
+    return [segments[big], {"name": _merge(index_dir, rest, quantized), "dropped": []}]
+
+
+def upsert(
+    index_dir: Path | str,
+    vectors: np.ndarray,
+    texts: Sequence[str],
+    metas: Sequence[Dict],
+    drop_sources: Iterable[str],
+) -> None:
+    """Publish a generation with every row of `drop_sources` removed and the given rows added.
+
+    Writes only the new rows; older segments just gain entries in their
+    `dropped` list, until a merge is due.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    old = read_manifest(index_dir)
+    drop = sorted(set(drop_sources))
+    segments = []
+    for s in old["segments"]:
+        seg_dir = index_dir / s["name"]
+        srcs = _sources(seg_dir)
+        dropped = sorted(set(s.get("dropped", [])) | {str(x) for x in srcs[np.isin(srcs, drop)]})
+        if len(dropped) < len(srcs):  # a segment with every source dropped serves nothing
+            segments.append({"name": s["name"], "dropped": dropped})
+    new = _write_segment(index_dir, vectors, texts, metas, old["quantized"]) if len(texts) else None
+    if new:
+        segments.append({"name": new, "dropped": []})
+    segments = _compact(index_dir, segments, old["quantized"])
+    _publish(index_dir, old, segments, old["quantized"])
+    if new and new not in {s["name"] for s in segments}:
+        shutil.rmtree(index_dir / new, ignore_errors=True)  # merged before it was ever published
+
+
+class Segment:
+    """Read-only view over one segment directory; cheap to open."""
+
+    def __init__(self, seg_dir: Path | str, quantized: bool = False, dropped: Sequence[str] = ()):
+        self.path = Path(seg_dir)
+        self.vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r", allow_pickle=False)
+        self.meta = np.load(self.path / META_FILE, mmap_mode="r", allow_pickle=False)
+        self.part_keys = np.load(self.path / PART_KEYS_FILE, mmap_mode="r", allow_pickle=False)
+        self.part_bounds = np.load(self.path / PART_BOUNDS_FILE, mmap_mode="r", allow_pickle=False)
+        self.codes = self.scales = None
+        if quantized:
+            self.codes = np.load(self.path / Q8_FILE, mmap_mode="r", allow_pickle=False)
+            self.scales = np.load(self.path / SCALES_FILE, mmap_mode="r", allow_pickle=False)
+        # Rows of sources replaced in later segments; None when all rows are live
+        self.live = ~np.isin(self.meta["source"], list(dropped)) if dropped else None
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    # ----- row selection -----
+    def _partitions(self, client: Optional[str], partial: bool = True) -> List[int]:
+        if client is None:
+            return list(range(len(self.part_keys)))
+        i = int(np.searchsorted(self.part_keys, client))
+        if i < len(self.part_keys) and self.part_keys[i] == client:
+            return [i]
+        if not partial:
+            return []
+        # Partial name: fall back to a substring match over the key array
+        return [int(j) for j in np.flatnonzero(np.char.find(self.part_keys, client) >= 0)]
+
+    def select(
+        self, client: Optional[str] = None, since: Optional[str] = None, partial: bool = True
+    ) -> Optional[np.ndarray]:
+        """Row ids for a client slice and/or date window; None means every row.
+
+        With `partial`, a client key that matches no partition exactly selects
+        every partition containing it as a substring (partial company names).
+        """
+        if client is None and since is None:
+            return None
+        parts = []
+        for p in self._partitions(client, partial):
+            start, end = int(self.part_bounds[p]), int(self.part_bounds[p + 1])
+            if since:
+                start += int(np.searchsorted(self.meta["date"][start:end], since))
+            parts.append(np.arange(start, end))
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return rows if self.live is None else rows[self.live[rows]]
+
+    # ----- scoring -----
+    def _q8_scores(self, q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        if rows is not None:
+            return (self.codes[rows].astype(np.float32) @ q) * self.scales[rows]
+        out = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            end = start + SCAN_BLOCK_ROWS
+            out[start:end] = self.codes[start:end].astype(np.float32) @ q
+        return out * self.scales
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _decay(self, rows: np.ndarray, half_life_days: float, today: date) -> np.ndarray:
+        dates = np.array([d or "NaT" for d in self.meta["date"][rows]], dtype="datetime64[D]")
+        age = (np.datetime64(today, "D") - dates).astype(np.float64)
+        dated = ~np.isnat(dates)
+        if not dated.any():
+            return np.ones(len(rows), dtype=np.float32)
+        # Undated notes take the candidates' median age: neither boosted over
+        # recent notes nor buried under old ones
+        age = np.where(dated, age, np.median(age[dated]))
+        return np.power(0.5, np.clip(age, 0, None) / half_life_days).astype(np.float32)
+
+    def search(
+        self,
+        query_vec: Sequence[float],
+        k: int = 3,
+        rescore: int = 4,
+        client: Optional[str] = None,
+        since: Optional[str] = None,
+        half_life_days: Optional[float] = None,
+        today: Optional[date] = None,
+        partial: bool = True,
+    ) -> List[Dict]:
+        """Cosine top-k; returns dicts with text, source, client, date and score.
+
+        `client` (slug) and `since` (ISO date) restrict the scan to that slice
+        of rows. On a quantized index the int8 scan keeps ``k * rescore``
+        candidates, which are then rescored in float32 (``rescore=0`` skips
+        that pass). With `half_life_days`, the best candidates are scaled by
+        0.5 ** (age / half_life) and re-ranked.
+        """
+        if len(self) == 0 or k <= 0:
+            return []
+        rows = self.select(client, since, partial)
+        if rows is not None and len(rows) == 0:
+            return []
+        q = normalize(np.asarray(query_vec, dtype=np.float32))
+        want = k * RECENCY_POOL if half_life_days else k
+
+        if self.codes is None:
+            scores = (self.vectors @ q) if rows is None else (self.vectors[rows] @ q)
+            if rows is None and self.live is not None:
+                scores = np.where(self.live, scores, -np.inf)
+            pos = self._top(scores, want)
+            cand, cand_scores = (pos if rows is None else rows[pos]), scores[pos]
+        else:
+            approx = self._q8_scores(q, rows)
+            if rows is None and self.live is not None:
+                approx = np.where(self.live, approx, -np.inf)
+            pos = self._top(approx, max(want, k * rescore) if rescore else want)
+            cand = pos if rows is None else rows[pos]
+            if rescore:
+                cand = np.sort(cand)
+                cand_scores = self.vectors[cand] @ q
+            else:
+                cand_scores = approx[pos]
+
+        if self.live is not None:
+            # Fewer live rows than candidates: drop the masked ones that filled the gap
+            keep = self.live[cand]
+            cand, cand_scores = cand[keep], cand_scores[keep]
+        if half_life_days:
+            cand_scores = cand_scores * self._decay(cand, half_life_days, today or date.today())
+        best = self._top(cand_scores, k)
+        return [
+            {
+                "text": str(self.meta["text"][i]),
+                "source": str(self.meta["source"][i]),
+                "client": str(self.meta["client"][i]),
+                "date": str(self.meta["date"][i]),
+                "score": float(s),
+            }
+            for i, s in zip(cand[best], cand_scores[best])
+        ]
+
+
+class NpyIndex:
+    """The published generation of an index directory: its segments, opened read-only.
+
+    `quantized` scans the int8 copies when the index has them.
+    """
+
+    def __init__(self, index_dir: Path | str, quantized: bool = False):
+        self.path = Path(index_dir)
+        manifest = read_manifest(self.path)
+        self.quantized = quantized and manifest["quantized"]
+        self.segments = [
+            Segment(self.path / s["name"], self.quantized, s.get("dropped", ())) for s in manifest["segments"]
+        ]
+
+    def __len__(self) -> int:
+        return sum(len(s) if s.live is None else int(s.live.sum()) for s in self.segments)
+
+    def search(self, query_vec: Sequence[float], k: int = 3, **kwargs) -> List[Dict]:
+        """Top-k over all segments; takes the same arguments as `Segment.search`."""
+        hits = [h for seg in self.segments for h in seg.search(query_vec, k=k, **kwargs)]
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits[:k]
+
+
+def open_index(index_dir: Path | str, quantized: bool = False) -> NpyIndex:
+    return NpyIndex(index_dir, quantized=quantized)
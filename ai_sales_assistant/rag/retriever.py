@@ -1,53 +1,207 @@
 from __future__ import annotations
+from datetime import date, timedelta
+from functools import lru_cache
 from pathlib import Path
 import os
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from chromadb.config import Settings
+from ai_sales_assistant.rag.ingest import client_slug, stamp
 
 VECTOR_DIR = "data/vectorstore"
+NPY_DIR = os.getenv("NPY_INDEX_DIR", "data/vectorstore_npy")
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# "chroma" (default) or "npy" (memory-mapped NumPy index, see rag/npy_index.py)
+BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+# Pre-embedded interactions.notes (built by scripts/embed_interactions.py)
+INTERACTIONS_DIR = os.getenv("INTERACTIONS_INDEX_DIR", "data/vectorstore_interactions")
+INTERACTIONS_COLLECTION = "interactions"
+# npy backend only: scan the int8 copy and rescore candidates in float32
+NPY_QUANTIZED = os.getenv("NPY_QUANTIZED", "0") == "1"
 
 # Extra safeguard to silence telemetry on some Chroma versions
 os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
 
-def load_vectorstore() -> Chroma:
+@lru_cache(maxsize=1)
+def _local_embeddings():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+
+@lru_cache(maxsize=1)
+def get_embeddings():
+    from ai_sales_assistant.rag.embed_server import SOCKET_PATH, RemoteEmbeddings, supported
+    if SOCKET_PATH and supported():
+        # Shared server (scripts/embed_server.py); loads the local model only if it is down
+        return RemoteEmbeddings(SOCKET_PATH, fallback=_local_embeddings)
+    return _local_embeddings()
+
+def load_vectorstore():
+    from langchain_chroma import Chroma
+    from chromadb.config import Settings
     # Use embedding_function for langchain_community==0.2.x compatibility
     return Chroma(
         persist_directory=VECTOR_DIR,
-        embedding_function=HuggingFaceEmbeddings(model_name=EMBED_MODEL),
+        embedding_function=get_embeddings(),
         client_settings=Settings(anonymized_telemetry=False),
     )
 
-def notes_search(query: str, k: int = 3, client_name: Optional[str] = None) -> List[Dict]:
-    """Return top-k snippets with source; if client_name provided, bias by filename match."""
-    vs = load_vectorstore()
-    docs = vs.similarity_search(query, k=k*2)  # fetch extra to filter
+@lru_cache(maxsize=1)
+def _chroma_at(version: int):
+    if version:
+        # The index was updated out of process; drop Chroma's per-path system cache
+        # so the reopened client reads the new segments from disk.
+        from chromadb.api.client import SharedSystemClient
+        SharedSystemClient.clear_system_cache()
+    return load_vectorstore()
+
+def _chroma():
+    return _chroma_at(stamp(VECTOR_DIR))
+
+def index_stamp() -> int:
+    """Version stamp of the notes index for the active backend."""
+    return stamp(NPY_DIR if BACKEND == "npy" else VECTOR_DIR)
+
+@lru_cache(maxsize=1)
+def _npy_at(version: int):
+    from ai_sales_assistant.rag.npy_index import open_index
+    return open_index(NPY_DIR, quantized=NPY_QUANTIZED)
+
+def load_npy_index():
+    """Open (or reuse) the npy index; reopens cheaply when ingest bumps its stamp."""
+    return _npy_at(stamp(NPY_DIR))
+
+@lru_cache(maxsize=1)
+def _interactions_npy_at(version: int):
+    from ai_sales_assistant.rag.npy_index import open_index
+    return open_index(INTERACTIONS_DIR)
+
+@lru_cache(maxsize=1)
+def _interactions_collection_at(version: int):
+    import chromadb
+    from chromadb.config import Settings
+    client = chromadb.PersistentClient(path=VECTOR_DIR, settings=Settings(anonymized_telemetry=False))
+    return client.get_collection(INTERACTIONS_COLLECTION)
+
+def _decay(metas: List[Dict], half_life_days: float, today: date) -> List[float]:
+    ages = [max((today - date.fromisoformat(m["date"])).days, 0) if m.get("date") else None for m in metas]
+    dated = sorted(a for a in ages if a is not None)
+    # Undated notes take the candidates' median age (same rule as npy_index)
+    neutral = dated[len(dated) // 2] if dated else 0
+    return [0.5 ** ((neutral if a is None else a) / half_life_days) for a in ages]
+
+def _chroma_search(query: str, k: int, conds: List[Dict], half_life_days: Optional[float]) -> List[Tuple[str, Dict]]:
+    where = None if not conds else conds[0] if len(conds) == 1 else {"$and": conds}
+    if not half_life_days:
+        return [(d.page_content, d.metadata) for d in _chroma().similarity_search(query, k=k, filter=where)]
+    scored = _chroma().similarity_search_with_relevance_scores(query, k=k * 4, filter=where)
+    factors = _decay([d.metadata for d, _ in scored], half_life_days, date.today())
+    ranked = sorted(zip(scored, factors), key=lambda sf: sf[0][1] * sf[1], reverse=True)
+    return [(d.page_content, d.metadata) for (d, _), _ in ranked[:k]]
+
+def _similarity_search(
+    query: str,
+    k: int,
+    client: Optional[str] = None,
+    since: Optional[str] = None,
+    half_life_days: Optional[float] = None,
+) -> List[Tuple[str, Dict]]:
+    """Backend-agnostic top-k as (text, metadata) pairs.
+
+    The npy backend scans only the rows of `client` (slug) dated on/after
+    `since`. Chroma applies both as metadata filters; when the slug matches
+    no chunk exactly (a partial name, or an index built before chunks had a
+    client field) it searches all clients and leaves the match to the caller.
+    """
+    if BACKEND == "npy":
+        qvec = get_embeddings().embed_query(query)
+        hits = load_npy_index().search(qvec, k=k, client=client, since=since, half_life_days=half_life_days)
+        return [(h["text"], {"source": h["source"], "date": h["date"]}) for h in hits]
+
+    conds = []
+    if since:
+        conds.append({"date_ord": {"$gte": date.fromisoformat(since).toordinal() - date(1970, 1, 1).toordinal()}})
+    if client:
+        docs = _chroma_search(query, k, [*conds, {"client": client}], half_life_days)
+        if docs:
+            return docs
+    return _chroma_search(query, k, conds, half_life_days)
+
+def _excerpt(text: str) -> str:
+    excerpt = text.strip()
+    if len(excerpt) > 350:
+        excerpt = excerpt[:347] + "..."
+    return excerpt
+
+def _hit(text: str, meta: Dict) -> Dict:
+    out = {"text": _excerpt(text), "source": Path(meta.get("source", "")).name}
+    if meta.get("date"):
+        out["date"] = meta["date"]
+    return out
+
+def notes_search(
+    query: str,
+    k: int = 3,
+    client_name: Optional[str] = None,
+    since_days: Optional[int] = None,
+    half_life_days: Optional[float] = None,
+) -> List[Dict]:
+    """Return top-k snippets with source; if client_name provided, bias by filename match.
+
+    `since_days` keeps only notes dated within that many days (e.g. 90);
+    `half_life_days` down-weights older notes by 0.5 ** (age / half_life).
+    """
+    since = (date.today() - timedelta(days=since_days)).isoformat() if since_days else None
+    slug = client_slug(client_name) if client_name else None
+    docs = _similarity_search(query, k=k*2, client=slug, since=since, half_life_days=half_life_days)  # fetch extra to filter
     out = []
     seen_texts = set()
-    for d in docs:
-        src = d.metadata.get("source", "")
-        if client_name:
-            slug = client_name.lower().replace(" ", "_")
-            if slug not in src.lower():
-                continue
-        excerpt = d.page_content.strip()
-        if len(excerpt) > 350:
-            excerpt = excerpt[:347] + "..."
-        if excerpt in seen_texts:
+    for text, meta in docs:
+        src = meta.get("source", "")
+        if slug and slug not in src.lower():
             continue
-        seen_texts.add(excerpt)
-        out.append({"text": excerpt, "source": Path(src).name})
+        hit = _hit(text, meta)
+        if hit["text"] in seen_texts:
+            continue
+        seen_texts.add(hit["text"])
+        out.append(hit)
         if len(out) >= k:
             break
     # Fallback: if filter removed all, return top-k unfiltered
     if not out:
-        for d in docs[:k]:
-            src = Path(d.metadata.get("source", "")).name
-            excerpt = d.page_content.strip()
-            if len(excerpt) > 350:
-                excerpt = excerpt[:347] + "..."
-            out.append({"text": excerpt, "source": src})
+        if slug and BACKEND == "npy":
+            docs = _similarity_search(query, k=k, since=since, half_life_days=half_life_days)
+        out = [_hit(text, meta) for text, meta in docs[:k]]
     return out
+
+def relevant_interactions(
+    topic: str,
+    k: int = 5,
+    client_name: Optional[str] = None,
+    client_id: Optional[int] = None,
+) -> List[Dict]:
+    """Past interactions most relevant to `topic`, optionally for one client.
+
+    Interaction notes are embedded ahead of time, so the only model call here
+    is the topic embedding; the hits are then loaded by primary key.
+    """
+    from ai_sales_assistant.db import repositories as repo
+
+    if client_id is None and client_name:
+        ov = repo.client_overview(client_name)
+        if not ov:
+            return []
+        client_id = ov["client_id"]
+
+    qvec = get_embeddings().embed_query(topic)
+    if BACKEND == "npy":
+        hits = _interactions_npy_at(stamp(INTERACTIONS_DIR)).search(
+            qvec, k=k, client=None if client_id is None else str(client_id), partial=False
+        )
+        ids = [int(h["source"]) for h in hits]
+    else:
+        res = _interactions_collection_at(stamp(VECTOR_DIR)).query(
+            query_embeddings=[qvec],
+            n_results=k,
+            where=None if client_id is None else {"client_id": int(client_id)},
+        )
+        ids = [int(i) for i in res["ids"][0]]
+    return repo.interactions_by_ids(ids)
@@ -0,0 +1,172 @@
+"""
+Synthetic datasets for the benchmark suite.
+
+Unlike scripts/demo_generate_data.py (pandas + Faker, realistic but slow),
+this writes straight into SQLite with executemany so the 1M-client scale is
+practical. Rows follow db/schema.sql, and note files mirror the demo format
+(same filename slugs and trailing "Company:" / "Date:" lines).
+"""
+
+from __future__ import annotations
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEMA_PATH = ROOT / "db" / "schema.sql"
+
+CHANNELS = ["Email", "Call", "Meeting"]
+SENTIMENTS = ["negative", "neutral", "positive"]
+TICKET_CATS = ["Billing", "Technical", "Delivery", "Account"]
+STATUSES = ["Open", "Pending", "Resolved"]
+PRIORITIES = ["Low", "Medium", "High"]
+INTERACTION_NOTES = [
+    "Discussed delivery delays; client asked for clearer ETA.",
+    "Positive feedback on onboarding; interested in analytics add-on.",
+    "Requested pricing for premium support.",
+    "Escalated bug impacted batch processing last week.",
+    "Renewal call scheduled; want case studies for healthcare sector.",
+    "Asked for integration with SAP; timeline concerns remain.",
+    "Happy with performance improvements since last sprint.",
+    "Considering downsizing license seats next quarter.",
+]
+NOTE_LINES = [
+    "Met with the CTO to review quarterly goals. Main concern: {c}. Interested in {i}. Next step: {n}.",
+    "Call recap: Discussed {c}. Client sentiment {s}. Considering {i}. Need follow-up on {n}.",
+    "Quarterly review: Performance {p}. Budget {b}. Risk {r}. Action: {n}.",
+]
+
+
+# Per-scale row counts; "notes" is the total number of note files, capped so
+# embedding the corpus stays tractable at the 1M-client scale.
+SCALES = {
+    "small":  {"clients": 10,        "months": 6, "interactions": 11, "tickets": 2, "notes": 25},
+    "medium": {"clients": 10_000,    "months": 6, "interactions": 11, "tickets": 2, "notes": 5_000},
+    "large":  {"clients": 1_000_000, "months": 6, "interactions": 4,  "tickets": 1, "notes": 20_000},
+}
+
+
+def company_name(i: int) -> str:
+    # Fixed-width ids keep LIKE '%name%' lookups unambiguous at every scale
+    return f"Bench {i:07d} {('Ltd', 'Inc', 'GmbH', 'SRL', 'SpA', 'PLC')[i % 6]}"
+
+
+def _month_starts(n: int) -> List[str]:
+    today = date.today()
+    y, m = today.year, today.month
+    out = []
+    for _ in range(n):
+        out.append(date(y, m, 1).isoformat())
+        m -= 1
+        if m == 0:
+            y, m = y - 1, 12
+    return sorted(out)
+
+
+def _ts(rng: random.Random, days: int) -> str:
+    dt = datetime.now() - timedelta(days=rng.randint(0, days), minutes=rng.randint(0, 1439))
+    return dt.replace(second=0, microsecond=0).isoformat()
+
+
+def _batched(it: Iterator, size: int = 50_000) -> Iterator[list]:
+    batch = []
+    for row in it:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build_db(scale: Dict, db_path: Path, seed: int = 42) -> None:
+    """Create db_path from schema.sql and fill it for `scale`."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    if db_path.exists():
+        db_path.unlink()
+    rng = random.Random(seed)
+    months = _month_starts(scale["months"])
+
+    def clients():
+        for i in range(1, scale["clients"] + 1):
+            yield (
+                i, company_name(i), rng.choice(["SaaS", "FinTech", "Healthcare"]),
+                rng.choice(["EMEA", "AMER", "APAC"]), round(rng.uniform(1e6, 2e7)),
+                f"Owner {i % 500:03d}", rng.choice(["Lead", "Customer", "Evangelist"]),
+                rng.choice(["Prospecting", "Negotiation", "Closed Won"]),
+                round(rng.uniform(5e4, 3e5), 2), (date.today() - timedelta(days=rng.randint(90, 1000))).isoformat(),
+            )
+
+    def metrics():
+        for i in range(1, scale["clients"] + 1):
+            for m in months:
+                yield (
+                    i, m, round(rng.uniform(8000, 60000), 2), round(rng.uniform(40, 95), 1),
+                    round(rng.uniform(0, 40), 1), rng.randint(0, 4), int(rng.random() < 0.25),
+                )
+
+    def interactions():
+        iid = 0
+        for i in range(1, scale["clients"] + 1):
+            for _ in range(scale["interactions"]):
+                iid += 1
+                yield (
+                    iid, i, _ts(rng, 180), rng.choice(CHANNELS), f"Owner {i % 500:03d}",
+                    rng.choice(INTERACTION_NOTES), rng.choice(SENTIMENTS),
+                )
+
+    def tickets():
+        tid = 0
+        for i in range(1, scale["clients"] + 1):
+            for _ in range(scale["tickets"]):
+                tid += 1
+                status = rng.choice(STATUSES)
+                opened = _ts(rng, 200)
+                resolved = opened if status == "Resolved" else None
+                yield (
+                    tid, i, rng.choice(TICKET_CATS), status, opened, resolved,
+                    0 if resolved else None, rng.choice(PRIORITIES),
+                )
+
+    inserts = [
+        ("INSERT INTO clients VALUES (?,?,?,?,?,?,?,?,?,?)", clients),
+        ("INSERT INTO metrics VALUES (?,?,?,?,?,?,?)", metrics),
+        ("INSERT INTO interactions VALUES (?,?,?,?,?,?,?)", interactions),
+        ("INSERT INTO tickets VALUES (?,?,?,?,?,?,?,?)", tickets),
+    ]
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+        conn.execute("PRAGMA synchronous=OFF;")
+        for sql, rows in inserts:
+            for batch in _batched(rows()):
+                conn.executemany(sql, batch)
+        conn.execute("ANALYZE;")
+
+
+def write_notes(scale: Dict, notes_dir: Path, seed: int = 42) -> List[Path]:
+    """Write scale["notes"] note files spread across clients; returns their paths."""
+    notes_dir.mkdir(parents=True, exist_ok=True)
+    for old in notes_dir.glob("*.txt"):
+        old.unlink()
+    rng = random.Random(seed)
+    paths = []
+    for n in range(scale["notes"]):
+        i = n % scale["clients"] + 1
+        name = company_name(i)
+        slug = name.lower().replace(" ", "_").replace(".", "")
+        text = rng.choice(NOTE_LINES).format(
+            c=rng.choice(["deployment delays", "data accuracy", "integration with ERP", "support responsiveness"]),
+            i=rng.choice(["analytics add-on", "premium support", "volume discount", "multi-year deal"]),
+            n=rng.choice(["send case studies", "schedule demo", "share revised quote", "draft SoW"]),
+            s=rng.choice(["neutral", "positive", "mixed", "negative"]),
+            p=rng.choice(["improving", "stable", "declining"]),
+            b=rng.choice(["tight", "flexible", "under review"]),
+            r=rng.choice(["low", "moderate", "elevated"]),
+        )
+        note_date = date.today() - timedelta(days=rng.randint(0, 1000))
+        path = notes_dir / f"{slug}_{n // scale['clients'] + 1}.txt"
+        path.write_text(f"{text}\n\nCompany: {name}\nDate: {note_date.isoformat()}", encoding="utf-8")
+        paths.append(path)
+    return paths
@@ -0,0 +1,279 @@
+"""
+Concurrent-user load generator for the brief path.
+
+Drives run_brief / run_talking_points against a scaled benchmark dataset with
+the offline stub LLM (LLM_BACKEND=fake: scripted ReAct with injected latency),
+stepping through one or more concurrency levels:
+
+  python benchmarks/loadgen.py --scale medium --concurrency 1,4,16,64 --duration 60
+  python benchmarks/loadgen.py --scale small --rate 5 --concurrency 32 --mix 0.3
+
+Without --rate each of the N users sends its next request as soon as the last
+one returns (closed loop). With --rate, requests arrive as a Poisson process
+at that many per second and queue for the N workers (open loop); latency is
+then measured from arrival, so the point where the app falls behind shows up
+as p99 growth. Results go to benchmarks/results/loadgen_<scale>.json.
+
+A brief that only came back through the deterministic fallback (agent out of
+budget or empty), or empty talking points, counts as degraded rather than ok.
+The saturation point is the first level where errors plus degraded answers
+exceed SATURATION_BAD_RATE, or where throughput stops growing.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = Path(__file__).resolve().parent
+if str(HERE) not in sys.path:
+    sys.path.insert(0, str(HERE))
+
+import run as bench
+
+
+# Seconds between RSS samples while a level runs
+RSS_SAMPLE_S = 0.2
+# Saturated once this share of requests errors or degrades...
+SATURATION_BAD_RATE = 0.05
+# ...or a level adds less than this relative throughput over the previous one
+SATURATION_MIN_GAIN = 0.05
+
+
+def _max_rss_mb() -> float:
+    """Process-lifetime peak RSS (ru_maxrss): cumulative across all levels so far."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024, 1)
+
+
+def _current_rss_mb() -> Optional[float]:
+    """RSS right now, from /proc (Linux); None where that is unavailable."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class RssSampler:
+    """Peak of the current RSS, sampled in the background while a level runs."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_S):
+        self.interval = interval
+        self.peak = _current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = _current_rss_mb()
+            if rss is not None:
+                self.peak = max(self.peak or 0.0, rss)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _pct(ms: List[float], p: float) -> float:
+    return round(ms[min(int(p * len(ms)), len(ms) - 1)], 1) if ms else 0.0
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.degraded = 0
+
+    def record(self, seconds: float, output: str = "", error: str = "", degraded: bool = False) -> None:
+        with self._lock:
+            if error:
+                self.errors[error] += 1
+                return
+            self.latencies.append(seconds)
+            if degraded or not output:
+                self.degraded += 1
+
+    def summary(self, elapsed: float, peak_rss_mb: Optional[float] = None) -> Dict:
+        ms = sorted(s * 1000 for s in self.latencies)
+        total = len(ms) + sum(self.errors.values())
+        return {
+            "requests": total,
+            "ok": len(ms),
+            "throughput_rps": round(len(ms) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": _pct(ms, 0.50),
+            "p95_ms": _pct(ms, 0.95),
+            "p99_ms": _pct(ms, 0.99),
+            "max_ms": round(ms[-1], 1) if ms else 0.0,
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            "errors": dict(self.errors),
+            "degraded": self.degraded,
+            "degraded_rate": round(self.degraded / total, 4) if total else 0.0,
+            # Sampled during this level only (None where unsupported)
+            "peak_rss_mb": round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+            "process_max_rss_mb": _max_rss_mb(),
+        }
+
+
+def one_request(names: List[str], mix: float, rec: Recorder, arrived: float, rng: random.Random) -> None:
+    from ai_sales_assistant.agent.agent import _agent_brief, fallback_brief, fetch_context, run_talking_points
+
+    name = rng.choice(names)
+    talking_points = rng.random() < mix
+    try:
+        if talking_points:
+            out = run_talking_points(name)
+            degraded = not out  # no fallback: empty means the agent ran out of budget
+        else:
+            # run_brief, unrolled so a fallback answer is counted as degraded
+            out = _agent_brief(name)
+            degraded = not out
+            if degraded:
+                out = fallback_brief(fetch_context(name))
+        rec.record(time.perf_counter() - arrived, out, degraded=degraded)
+    except Exception as e:
+        rec.record(time.perf_counter() - arrived, error=type(e).__name__)
+
+
+def run_level(names: List[str], concurrency: int, duration: float, rate: float, mix: float, seed: int) -> Dict:
+    rec = Recorder()
+    rng = random.Random(seed)
+    stop_at = time.perf_counter() + duration
+    t0 = time.perf_counter()
+
+    with RssSampler() as rss:
+        if rate > 0:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                next_at = t0
+                while next_at < stop_at:
+                    time.sleep(max(next_at - time.perf_counter(), 0))
+                    pool.submit(one_request, names, mix, rec, next_at, random.Random(rng.random()))
+                    next_at += rng.expovariate(rate)
+        else:
+            def user(i: int) -> None:
+                urng = random.Random(seed + i)
+                while time.perf_counter() < stop_at:
+                    one_request(names, mix, rec, time.perf_counter(), urng)
+
+            threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(concurrency)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+    # Drained: in-flight requests past the window count toward the elapsed time
+    return rec.summary(time.perf_counter() - t0, rss.peak)
+
+
+def saturation(levels: List[Dict]) -> Optional[Dict]:
+    """First level that degrades or stops scaling, with the reason; None if none did."""
+    prev = None
+    for lv in levels:
+        bad = lv["error_rate"] + lv["degraded_rate"]
+        if bad > SATURATION_BAD_RATE:
+            return {"concurrency": lv["concurrency"], "reason": f"{bad * 100:.1f}% errors + degraded"}
+        if prev and lv["throughput_rps"] < prev["throughput_rps"] * (1 + SATURATION_MIN_GAIN):
+            return {"concurrency": lv["concurrency"], "reason": "throughput stopped growing"}
+        prev = lv
+    return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", choices=list(bench.datagen.SCALES), default="small")
+    ap.add_argument("--concurrency", default="1,4,16", help="Comma-separated user counts, run in turn")
+    ap.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level")
+    ap.add_argument("--rate", type=float, default=0.0, help="Open-loop arrivals per second (0 = closed loop)")
+    ap.add_argument("--mix", type=float, default=0.5, help="Fraction of requests that are talking points")
+    ap.add_argument("--llm-latency", type=float, default=0.3, help="Stub LLM seconds per call")
+    ap.add_argument("--llm-tail", type=float, default=3.0, help="Stub LLM slow-call seconds")
+    ap.add_argument("--llm-tail-prob", type=float, default=0.02)
+    ap.add_argument("--llm-error-prob", type=float, default=0.0)
+    ap.add_argument("--rpm", type=float, default=100_000, help="LLM rate limit during the run (default: effectively off)")
+    ap.add_argument("--tpm", type=float, default=1e9)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--rebuild", action="store_true", help="Regenerate the dataset")
+    args = ap.parse_args()
+
+    # Read at import time by the agent, limiter and resilience modules
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "AGENT_VERBOSE": "0",
+        "FAKE_LLM_LATENCY_S": str(args.llm_latency),
+        "FAKE_LLM_TAIL_S": str(args.llm_tail),
+        "FAKE_LLM_TAIL_PROB": str(args.llm_tail_prob),
+        "FAKE_LLM_ERROR_PROB": str(args.llm_error_prob),
+        "GROQ_RPM": str(args.rpm),
+        "GROQ_TPM": str(args.tpm),
+    })
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    base = bench.prepare(args.scale, args.rebuild)
+    bench._ensure_index(base)
+    bench._use_bench_index(base)
+    names = bench._sample_names(args.scale, 200)
+
+    from ai_sales_assistant.agent.ratelimit import get_limiter
+
+    mode = f"open loop {args.rate:g}/s" if args.rate > 0 else "closed loop"
+    print(f"[load] {args.scale}: {len(names)} clients, {mode}, stub LLM {args.llm_latency:g}s/call")
+    results = []
+    for c in levels:
+        summary = run_level(names, c, args.duration, args.rate, args.mix, args.seed)
+        summary.update(concurrency=c, llm_queue=get_limiter().stats())
+        results.append(summary)
+        rss = f"process max rss {summary['process_max_rss_mb']:.0f} MB (cumulative)"
+        if summary["peak_rss_mb"] is not None:
+            rss = f"rss {summary['peak_rss_mb']:.0f} MB, {rss}"
+        print(
+            f"  users {c:>4}  {summary['throughput_rps']:7.2f} req/s  p50 {summary['p50_ms']:8.1f} ms  "
+            f"p95 {summary['p95_ms']:8.1f} ms  p99 {summary['p99_ms']:8.1f} ms  "
+            f"errors {summary['error_rate'] * 100:5.1f}%  degraded {summary['degraded_rate'] * 100:5.1f}%  {rss}"
+        )
+        for err, n in summary["errors"].items():
+            print(f"           {err}: {n}")
+
+    sat = saturation(results)
+    if sat:
+        print(f"[load] saturated at {sat['concurrency']} users ({sat['reason']})")
+    else:
+        print("[load] no saturation up to the highest level")
+
+    bench.RESULTS_DIR.mkdir(exist_ok=True)
+    out = bench.RESULTS_DIR / f"loadgen_{args.scale}.json"
+    payload = {
+        "scale": args.scale,
+        "python": platform.python_version(),
+        "args": vars(args),
+        "levels": results,
+        "saturation": sat,
+    }
+    out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"[load] results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Micro-benchmarks for the repositories, retriever, note ingestion and the
+deterministic fallback brief, at 10 / 10k / 1M client scale.
+
+  python benchmarks/run.py --scale small                 # compare with baseline
+  python benchmarks/run.py --scale medium --save-baseline
+  python benchmarks/run.py --scale all --suite repositories --threshold 0.3
+
+Datasets are generated once under benchmarks/.data/<scale>/ (see datagen.py)
+and reused; pass --rebuild to regenerate. Results are written to
+benchmarks/results/<scale>.json; with a baseline in benchmarks/baselines/
+the run exits non-zero when any p50 regresses beyond --threshold.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+HERE = Path(__file__).resolve().parent
+for p in (ROOT, ROOT / "scripts", HERE):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+import datagen
+from ai_sales_assistant.db import archive
+from ai_sales_assistant.db import repositories as repo
+
+DATA_DIR = HERE / ".data"
+RESULTS_DIR = HERE / "results"
+BASELINE_DIR = HERE / "baselines"
+SUITES = ("repositories", "retriever", "ingest", "fallback")
+# Regressions smaller than this are treated as timer noise
+NOISE_FLOOR_MS = 0.05
+# Metrics with fewer samples are reported but not gated against the baseline
+MIN_COMPARE_SAMPLES = 3
+# Full index builds per ingest run; each one embeds the whole corpus
+INGEST_SAMPLES = int(os.getenv("BENCH_INGEST_SAMPLES", "5"))
+# Archive pass applied to each dataset so include_archive reads hit real rows;
+# keeps the 5 newest interactions per client hot (what recent_interactions reads)
+ARCHIVE_DAYS = 90
+ARCHIVE_KEEP = 5
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "p50_ms": round(statistics.median(ms), 4),
+        "p95_ms": round(ms[int(0.95 * (len(ms) - 1))], 4),
+        "mean_ms": round(statistics.mean(ms), 4),
+    }
+
+
+def timeit(fn: Callable, args_list: List[tuple], iterations: int, warmup: int = 2) -> Dict[str, float]:
+    for args in args_list[:warmup]:
+        fn(*args)
+    samples = []
+    for n in range(iterations):
+        args = args_list[n % len(args_list)]
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    return _stats(samples)
+
+
+def prepare(scale_name: str, rebuild: bool) -> Path:
+    scale = datagen.SCALES[scale_name]
+    base = DATA_DIR / scale_name
+    db_path = base / "local.db"
+    if rebuild or not db_path.exists():
+        t0 = time.perf_counter()
+        datagen.build_db(scale, db_path)
+        datagen.write_notes(scale, base / "meeting_notes")
+        print(f"[bench] generated {scale_name} dataset in {time.perf_counter() - t0:.1f}s")
+    if not archive.path_for(db_path).exists():
+        moved = archive.archive_history(db_path, ARCHIVE_DAYS, ARCHIVE_DAYS, interactions_keep=ARCHIVE_KEEP)
+        print(f"[bench] archived {moved['interactions']:,} interactions and {moved['tickets']:,} tickets")
+    repo.DB_PATH = db_path
+    return base
+
+
+def _sample_names(scale_name: str, n: int = 50) -> List[str]:
+    clients = datagen.SCALES[scale_name]["clients"]
+    step = max(clients // n, 1)
+    return [datagen.company_name(i) for i in range(1, clients + 1, step)][:n]
+
+
+def bench_repositories(scale_name: str, base: Path, iterations: int) -> Dict[str, Dict]:
+    names = [(n,) for n in _sample_names(scale_name)]
+    ids = [(list(range(i, i + 5)),) for i in range(1, 50 * 5, 5)]
+    since = max(repo.latest_version() - 100, 0)
+    clients = datagen.SCALES[scale_name]["clients"]
+    batch = [(list(range(i, min(i + 50, clients + 1))),) for i in range(1, clients + 1, max(clients // 20, 50))]
+    owners = [(f"Owner {i:03d}",) for i in range(1, 21)]
+    return {
+        "repo.client_overview": timeit(repo.client_overview, names, iterations),
+        "repo.kpi_snapshot": timeit(repo.kpi_snapshot, [(n, 3) for (n,) in names], iterations),
+        "repo.recent_interactions": timeit(repo.recent_interactions, [(n, 5) for (n,) in names], iterations),
+        "repo.open_tickets": timeit(repo.open_tickets, names, iterations),
+        "repo.interactions_by_ids": timeit(repo.interactions_by_ids, ids, iterations),
+        "repo.client_freshness": timeit(repo.client_freshness, names, iterations),
+        # History reads that union the hot tables with local_archive.db
+        "repo.recent_interactions[archive]": timeit(
+            lambda n: repo.recent_interactions(n, 20, include_archive=True), names, iterations
+        ),
+        "repo.open_tickets[archive]": timeit(
+            lambda n: repo.open_tickets(n, include_archive=True), names, iterations
+        ),
+        # Bulk variants: 50 clients per call, vs 50 calls of the per-client functions above
+        "repo.client_overviews[50]": timeit(lambda c: list(repo.client_overviews(c)), batch, iterations),
+        "repo.kpi_snapshot_many[50]": timeit(lambda c: list(repo.kpi_snapshot_many(c, months=3)), batch, iterations),
+        "repo.recent_interactions_many[50]": timeit(
+            lambda c: list(repo.recent_interactions_many(c, limit=5)), batch, iterations
+        ),
+        "repo.open_tickets_many[50]": timeit(lambda c: list(repo.open_tickets_many(c)), batch, iterations),
+        "repo.client_overviews[owner]": timeit(lambda o: list(repo.client_overviews(owner_name=o)), owners, iterations),
+        "repo.kpi_snapshot_many[owner]": timeit(
+            lambda o: list(repo.kpi_snapshot_many(owner_name=o, months=3)), owners, iterations
+        ),
+        "repo.recent_interactions_many[owner]": timeit(
+            lambda o: list(repo.recent_interactions_many(owner_name=o, limit=5)), owners, iterations
+        ),
+        "repo.open_tickets_many[owner]": timeit(lambda o: list(repo.open_tickets_many(owner_name=o)), owners, iterations),
+        "repo.latest_version": timeit(repo.latest_version, [()], iterations),
+        "repo.client_versions_since": timeit(repo.client_versions_since, [(since,)], iterations),
+        "repo.client_versions": timeit(repo.client_versions, [([1, 2, 3, 4, 5],)], iterations),
+    }
+
+
+def _use_bench_index(base: Path) -> None:
+    from ai_sales_assistant.rag import retriever
+    retriever.BACKEND = "npy"
+    retriever.NPY_DIR = str(base / "vectorstore_npy")
+
+
+def _index_builder(base: Path):
+    """scripts/build_vectorstore.py, pointed at the scale's index directories."""
+    import build_vectorstore
+
+    build_vectorstore.NPY_DIR = base / "vectorstore_npy"
+    build_vectorstore.PERSIST_DIR = base / "vectorstore"
+    return build_vectorstore
+
+
+def _ensure_index(base: Path) -> None:
+    from ai_sales_assistant.rag import retriever
+    from ai_sales_assistant.rag.ingest import split_notes
+
+    if not (base / "vectorstore_npy").exists():
+        texts, metas = split_notes(sorted((base / "meeting_notes").glob("*.txt")))
+        _index_builder(base).build_npy(texts, metas, retriever.get_embeddings())
+
+
+def bench_ingest(scale_name: str, base: Path, iterations: int) -> Dict[str, Dict]:
+    """Full builds of the scale's note corpus with build_vectorstore's own functions.
+
+    Each of INGEST_SAMPLES runs splits the notes, then builds the npy index and
+    (when langchain_chroma is installed) a fresh Chroma store; both builds
+    include embedding.
+    """
+    import shutil
+    from ai_sales_assistant.rag import retriever
+    from ai_sales_assistant.rag.ingest import split_notes
+
+    builder = _index_builder(base)
+    paths = sorted((base / "meeting_notes").glob("*.txt"))
+    emb = retriever.get_embeddings()
+    try:
+        import langchain_chroma  # noqa: F401
+        chroma_root = base / "vectorstore_bench"
+        shutil.rmtree(chroma_root, ignore_errors=True)
+    except ImportError as e:
+        print(f"[bench] {scale_name}/ingest: Chroma build skipped ({e})")
+        chroma_root = None
+
+    samples: Dict[str, List[float]] = {"ingest.split": [], "ingest.build_npy": [], "ingest.npy_per_chunk": []}
+    if chroma_root:
+        samples["ingest.build_chroma"] = []
+    for i in range(INGEST_SAMPLES):
+        t0 = time.perf_counter()
+        texts, metas = split_notes(paths)
+        t1 = time.perf_counter()
+        builder.build_npy(texts, metas, emb)
+        t2 = time.perf_counter()
+        samples["ingest.split"].append(t1 - t0)
+        samples["ingest.build_npy"].append(t2 - t1)
+        samples["ingest.npy_per_chunk"].append((t2 - t0) / max(len(texts), 1))
+        if chroma_root:
+            # from_texts appends to an existing collection, so every run gets an empty directory
+            builder.PERSIST_DIR = chroma_root / str(i)
+            t0 = time.perf_counter()
+            builder.build_chroma(texts, metas, emb)
+            samples["ingest.build_chroma"].append(time.perf_counter() - t0)
+    return {name: _stats(s) for name, s in samples.items()}
+
+
+def bench_retriever(scale_name: str, base: Path, iterations: int) -> Dict[str, Dict]:
+    from ai_sales_assistant.rag.retriever import notes_search
+
+    _ensure_index(base)
+    _use_bench_index(base)
+    names = _sample_names(scale_name)
+    topics = ["renewal timing", "integration with ERP", "support responsiveness", "volume discount"]
+    return {
+        "notes_search.global": timeit(notes_search, [(t, 3) for t in topics], iterations),
+        "notes_search.client": timeit(
+            notes_search, [(topics[i % 4], 3, n) for i, n in enumerate(names)], iterations
+        ),
+        "notes_search.client_90d": timeit(
+            lambda q, n: notes_search(q, 3, n, since_days=90),
+            [(topics[i % 4], n) for i, n in enumerate(names)],
+            iterations,
+        ),
+    }
+
+
+def bench_fallback(scale_name: str, base: Path, iterations: int) -> Dict[str, Dict]:
+    from ai_sales_assistant.agent.agent import fallback_brief, fetch_context
+
+    _ensure_index(base)
+    _use_bench_index(base)
+    names = [(n,) for n in _sample_names(scale_name)]
+    return {
+        "fallback.fetch_context": timeit(lambda n: fetch_context(n, use_store=False), names, iterations),
+        "fallback.fetch_context_stored": timeit(fetch_context, names, iterations),
+        "fallback.brief": timeit(lambda n: fallback_brief(fetch_context(n, use_store=False)), names, iterations),
+    }
+
+
+BENCHES = {
+    "repositories": bench_repositories,
+    "retriever": bench_retriever,
+    "ingest": bench_ingest,
+    "fallback": bench_fallback,
+}
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    failures = []
+    for name, cur in results.items():
+        old = baseline.get(name)
+        # A p50 of one or two runs is noise, not a regression signal
+        if not old or min(cur["n"], old["n"]) < MIN_COMPARE_SAMPLES:
+            continue
+        limit = old["p50_ms"] * (1 + threshold)
+        if cur["p50_ms"] > limit and cur["p50_ms"] - old["p50_ms"] > NOISE_FLOOR_MS:
+            failures.append(
+                f"{name}: p50 {cur['p50_ms']:.3f} ms vs baseline {old['p50_ms']:.3f} ms "
+                f"(+{(cur['p50_ms'] / old['p50_ms'] - 1) * 100:.0f}%)"
+            )
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", choices=[*datagen.SCALES, "all"], default="small")
+    ap.add_argument("--suite", default=",".join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}")
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--threshold", type=float, default=0.25, help="Allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    ap.add_argument("--rebuild", action="store_true", help="Regenerate the dataset")
+    args = ap.parse_args()
+
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        sys.exit(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+    scales = list(datagen.SCALES) if args.scale == "all" else [args.scale]
+
+    failed = False
+    for scale_name in scales:
+        base = prepare(scale_name, args.rebuild)
+        results: Dict[str, Dict] = {}
+        for suite in suites:
+            try:
+                results.update(BENCHES[suite](scale_name, base, args.iterations))
+            except ImportError as e:
+                print(f"[bench] {scale_name}/{suite}: skipped ({e})")
+
+        print(f"[bench] {scale_name} ({datagen.SCALES[scale_name]['clients']:,} clients)")
+        for name, st in results.items():
+            print(f"  {name:<38} p50 {st['p50_ms']:9.3f} ms  p95 {st['p95_ms']:9.3f} ms  n={st['n']}")
+
+        RESULTS_DIR.mkdir(exist_ok=True)
+        payload = {"scale": scale_name, "python": platform.python_version(), "results": results}
+        (RESULTS_DIR / f"{scale_name}.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+        baseline_path = BASELINE_DIR / f"{scale_name}.json"
+        if args.save_baseline:
+            BASELINE_DIR.mkdir(exist_ok=True)
+            baseline_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            print(f"[bench] baseline saved to {baseline_path}")
+        elif baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+            failures = compare(results, baseline, args.threshold)
+            for f in failures:
+                print(f"[bench] REGRESSION {scale_name} {f}")
+            failed = failed or bool(failures)
+        else:
+            print(f"[bench] no baseline at {baseline_path}; run with --save-baseline to create one")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
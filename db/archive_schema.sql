@@ -0,0 +1,27 @@
+-- Cold history moved out of local.db by scripts/archive_history.py.
+-- Same columns as the hot tables in schema.sql, minus the foreign keys
+-- (an attached database cannot reference main.clients).
+
+CREATE TABLE IF NOT EXISTS archive.interactions (
+  interaction_id INTEGER PRIMARY KEY,
+  client_id      INTEGER NOT NULL,
+  timestamp      TEXT    NOT NULL,
+  channel        TEXT,
+  owner_name     TEXT,
+  notes          TEXT,
+  sentiment      TEXT
+);
+
+CREATE TABLE IF NOT EXISTS archive.tickets (
+  ticket_id             INTEGER PRIMARY KEY,
+  client_id             INTEGER NOT NULL,
+  category              TEXT,
+  status                TEXT,
+  opened_at             TEXT,
+  resolved_at           TEXT,
+  resolution_time_days  INTEGER,
+  priority              TEXT
+);
+
+CREATE INDEX IF NOT EXISTS archive.ix_interactions_client_time ON interactions(client_id, timestamp);
+CREATE INDEX IF NOT EXISTS archive.ix_tickets_client_status    ON tickets(client_id, status);
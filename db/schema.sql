@@ -65,3 +65,133 @@ CREATE INDEX IF NOT EXISTS ix_contacts_client            ON contacts(client_id);
 CREATE INDEX IF NOT EXISTS ix_metrics_client_month       ON metrics(client_id, month);
 CREATE INDEX IF NOT EXISTS ix_interactions_client_time   ON interactions(client_id, timestamp);
 CREATE INDEX IF NOT EXISTS ix_tickets_client_status      ON tickets(client_id, status);
+CREATE INDEX IF NOT EXISTS ix_clients_owner              ON clients(owner_name);
+
+-- Change-data-capture: every write to a client's rows appends to the changelog,
+-- and client_versions holds the latest changelog seq per client. Caches keyed on
+-- (client_id, version) can be invalidated exactly via changes since a known seq.
+CREATE TABLE IF NOT EXISTS changelog (
+  seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+  client_id   INTEGER NOT NULL,
+  table_name  TEXT    NOT NULL,
+  op          TEXT    NOT NULL,                 -- I/U/D
+  changed_at  TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS client_versions (
+  client_id   INTEGER PRIMARY KEY,              -- no FK: deletions are versioned too
+  version     INTEGER NOT NULL                  -- changelog.seq of the latest change
+);
+
+CREATE INDEX IF NOT EXISTS ix_changelog_client_seq       ON changelog(client_id, seq);
+
+-- CDC triggers (one per table x operation). UPDATE triggers also version the
+-- old client when a row moves between clients; they are dropped and recreated
+-- so that rerunning this file upgrades triggers in an existing DB.
+CREATE TRIGGER IF NOT EXISTS trg_clients_ins AFTER INSERT ON clients
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'clients', 'I');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+DROP TRIGGER IF EXISTS trg_clients_upd;
+CREATE TRIGGER trg_clients_upd AFTER UPDATE ON clients
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'clients', 'U');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+  INSERT INTO changelog(client_id, table_name, op)
+    SELECT OLD.client_id, 'clients', 'U' WHERE OLD.client_id <> NEW.client_id;
+  INSERT INTO client_versions(client_id, version)
+    SELECT OLD.client_id, last_insert_rowid() WHERE OLD.client_id <> NEW.client_id
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_del AFTER DELETE ON clients
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (OLD.client_id, 'clients', 'D');
+  INSERT INTO client_versions(client_id, version) VALUES (OLD.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metrics_ins AFTER INSERT ON metrics
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'metrics', 'I');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+DROP TRIGGER IF EXISTS trg_metrics_upd;
+CREATE TRIGGER trg_metrics_upd AFTER UPDATE ON metrics
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'metrics', 'U');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+  INSERT INTO changelog(client_id, table_name, op)
+    SELECT OLD.client_id, 'metrics', 'U' WHERE OLD.client_id <> NEW.client_id;
+  INSERT INTO client_versions(client_id, version)
+    SELECT OLD.client_id, last_insert_rowid() WHERE OLD.client_id <> NEW.client_id
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metrics_del AFTER DELETE ON metrics
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (OLD.client_id, 'metrics', 'D');
+  INSERT INTO client_versions(client_id, version) VALUES (OLD.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_interactions_ins AFTER INSERT ON interactions
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'interactions', 'I');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+DROP TRIGGER IF EXISTS trg_interactions_upd;
+CREATE TRIGGER trg_interactions_upd AFTER UPDATE ON interactions
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'interactions', 'U');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+  INSERT INTO changelog(client_id, table_name, op)
+    SELECT OLD.client_id, 'interactions', 'U' WHERE OLD.client_id <> NEW.client_id;
+  INSERT INTO client_versions(client_id, version)
+    SELECT OLD.client_id, last_insert_rowid() WHERE OLD.client_id <> NEW.client_id
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_interactions_del AFTER DELETE ON interactions
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (OLD.client_id, 'interactions', 'D');
+  INSERT INTO client_versions(client_id, version) VALUES (OLD.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tickets_ins AFTER INSERT ON tickets
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'tickets', 'I');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+DROP TRIGGER IF EXISTS trg_tickets_upd;
+CREATE TRIGGER trg_tickets_upd AFTER UPDATE ON tickets
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (NEW.client_id, 'tickets', 'U');
+  INSERT INTO client_versions(client_id, version) VALUES (NEW.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+  INSERT INTO changelog(client_id, table_name, op)
+    SELECT OLD.client_id, 'tickets', 'U' WHERE OLD.client_id <> NEW.client_id;
+  INSERT INTO client_versions(client_id, version)
+    SELECT OLD.client_id, last_insert_rowid() WHERE OLD.client_id <> NEW.client_id
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tickets_del AFTER DELETE ON tickets
+BEGIN
+  INSERT INTO changelog(client_id, table_name, op) VALUES (OLD.client_id, 'tickets', 'D');
+  INSERT INTO client_versions(client_id, version) VALUES (OLD.client_id, last_insert_rowid())
+    ON CONFLICT(client_id) DO UPDATE SET version = excluded.version;
+END;
@@ -0,0 +1,62 @@
+"""
+Move cold interactions and resolved tickets out of local.db into local_archive.db.
+
+  python scripts/archive_history.py                     # defaults: 365 / 180 days
+  python scripts/archive_history.py --interactions-days 180 --tickets-days 90 --vacuum
+  python scripts/archive_history.py --keep-interactions 20   # newest per client stay hot
+
+Safe to rerun (e.g. nightly): rows move in batches, each copy+delete in one
+transaction. Archived rows stay readable via include_archive=True on
+repositories.recent_interactions / open_tickets. Old changelog rows are pruned
+at the end of each run (client_versions keeps every client's current version).
+"""
+
+from __future__ import annotations
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ai_sales_assistant.db import archive
+from ai_sales_assistant.db.repositories import CHANGELOG_KEEP_ROWS, DB_PATH, prune_changelog
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", type=Path, default=DB_PATH)
+    ap.add_argument("--interactions-days", type=int, default=archive.INTERACTIONS_RETENTION_DAYS)
+    ap.add_argument("--keep-interactions", type=int, default=archive.INTERACTIONS_KEEP_PER_CLIENT,
+                    help="Newest interactions per client kept hot regardless of age")
+    ap.add_argument("--tickets-days", type=int, default=archive.TICKETS_RETENTION_DAYS,
+                    help="Archive Resolved tickets resolved more than this many days ago")
+    ap.add_argument("--changelog-keep", type=int, default=CHANGELOG_KEEP_ROWS,
+                    help="Newest changelog rows kept; older ones are pruned")
+    ap.add_argument("--vacuum", action="store_true", help="Shrink local.db afterwards (locks it briefly)")
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        sys.exit(f"❌ Database not found: {args.db}")
+
+    t0 = time.perf_counter()
+    moved = archive.archive_history(
+        args.db, args.interactions_days, args.tickets_days, interactions_keep=args.keep_interactions
+    )
+    print(
+        f"[archive] moved {moved['interactions']:,} interactions and {moved['tickets']:,} tickets "
+        f"→ {archive.path_for(args.db)} in {time.perf_counter() - t0:.1f}s"
+    )
+    dropped = prune_changelog(args.changelog_keep, args.db)
+    print(f"[archive] pruned {dropped:,} changelog rows (keeping {args.changelog_keep:,})")
+    if args.vacuum:
+        with sqlite3.connect(args.db) as conn:
+            conn.execute("VACUUM;")
+        print(f"[archive] vacuumed {args.db}")
+
+
+if __name__ == "__main__":
+    main()
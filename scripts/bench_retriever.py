@@ -0,0 +1,97 @@
+"""
+Compare the Chroma and memory-mapped NumPy note index backends.
+
+Build both first:
+  python scripts/build_vectorstore.py --backend both
+Then:
+  python scripts/bench_retriever.py --queries 200 --k 6
+
+Reports open (startup) time and per-query latency with the query embedding
+excluded, so the numbers isolate the index itself.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+from ai_sales_assistant.rag import retriever
+
+QUERIES = [
+    "renewal timing and budget",
+    "integration with ERP",
+    "support responsiveness concerns",
+    "analytics add-on interest",
+    "deployment delays",
+    "volume discount request",
+    "schedule demo next step",
+    "multi-year deal",
+]
+
+
+def _summary(name: str, open_s: float, lat: list[float]) -> None:
+    lat_ms = sorted(x * 1000 for x in lat)
+    p95 = lat_ms[int(0.95 * (len(lat_ms) - 1))]
+    print(
+        f"  {name:<6} open {open_s * 1000:8.1f} ms | "
+        f"query p50 {statistics.median(lat_ms):7.3f} ms  p95 {p95:7.3f} ms  mean {statistics.mean(lat_ms):7.3f} ms"
+    )
+
+
+def bench_chroma(qvecs, k: int) -> None:
+    t0 = time.perf_counter()
+    vs = retriever.load_vectorstore()
+    vs.similarity_search_by_vector(qvecs[0], k=k)  # first query forces collection load
+    open_s = time.perf_counter() - t0
+    lat = []
+    for q in qvecs:
+        t = time.perf_counter()
+        vs.similarity_search_by_vector(q, k=k)
+        lat.append(time.perf_counter() - t)
+    _summary("chroma", open_s, lat)
+
+
+def bench_npy(qvecs, k: int) -> None:
+    from ai_sales_assistant.rag.npy_index import open_index
+
+    t0 = time.perf_counter()
+    idx = open_index(retriever.NPY_DIR)
+    idx.search(qvecs[0], k=k)
+    open_s = time.perf_counter() - t0
+    lat = []
+    for q in qvecs:
+        t = time.perf_counter()
+        idx.search(q, k=k)
+        lat.append(time.perf_counter() - t)
+    _summary("npy", open_s, lat)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--backend", choices=["chroma", "npy", "both"], default="both")
+    args = ap.parse_args()
+
+    emb = retriever.get_embeddings()
+    base = emb.embed_documents(QUERIES)
+    qvecs = [base[i % len(base)] for i in range(args.queries)]
+
+    print(f"[bench] {args.queries} queries, k={args.k}")
+    if args.backend in ("chroma", "both"):
+        bench_chroma(qvecs, args.k)
+    if args.backend in ("npy", "both"):
+        bench_npy(qvecs, args.k)
+
+
+if __name__ == "__main__":
+    main()
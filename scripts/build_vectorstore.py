@@ -1,16 +1,95 @@
 from pathlib import Path
+import argparse
 import os
 import sys
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+# Make the ai_sales_assistant package importable when run as a script
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ai_sales_assistant.rag import embed_server
+from ai_sales_assistant.rag.ingest import NOTES_DIR, bump_stamp, split_notes
 
-NOTES_DIR = Path("data/meeting_notes")
 PERSIST_DIR = Path(os.getenv("VECTORSTORE_DIR", "data/vectorstore"))
+NPY_DIR = Path(os.getenv("NPY_INDEX_DIR", "data/vectorstore_npy"))
 MODEL_NAME = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 
+def _local_embeddings():
+    # Local, free embeddings
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=MODEL_NAME)
+
+def load_embeddings(socket_path):
+    if socket_path and embed_server.available(socket_path):
+        print(f"[vs] Embedding via server at {socket_path}")
+        return embed_server.RemoteEmbeddings(socket_path, fallback=_local_embeddings)
+    if socket_path:
+        print(f"[vs] No embedding server at {socket_path}; loading the model in-process")
+    return _local_embeddings()
+
+def build_chroma(texts, metas, embeddings):
+    from langchain_chroma import Chroma
+    PERSIST_DIR.mkdir(parents=True, exist_ok=True)
+    vs = Chroma.from_texts(
+        texts=texts,
+        embedding_function=embeddings,
+        metadatas=metas,
+        persist_directory=str(PERSIST_DIR),
+    )
+    vs.persist()
+    bump_stamp(PERSIST_DIR)
+    print(f"✅ Vector store built at {PERSIST_DIR.resolve()}")
+
+def build_npy(texts, metas, embeddings, quantize=False):
+    import numpy as np
+    from ai_sales_assistant.rag.npy_index import write_index
+
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    # Published as a new generation; open readers keep the old one until they reopen
+    write_index(NPY_DIR, vectors, texts, metas, quantized=quantize)
+    print(f"✅ NumPy index built at {NPY_DIR.resolve()} ({vectors.shape[0]}x{vectors.shape[1]})")
+    if quantize:
+        print(f"[vs] int8 copy written ({vectors.shape[0] * (vectors.shape[1] + 4):,} bytes vs {vectors.nbytes:,} float32)")
+
+def quantize_npy():
+    """Add the int8 copy to the existing npy index, from its stored float32 rows (no re-embedding)."""
+    from ai_sales_assistant.rag.npy_index import read_manifest, write_quantized
+
+    if not read_manifest(NPY_DIR)["segments"]:
+        sys.exit(f"❌ No npy index at {NPY_DIR}. Build one first with --backend npy.")
+    write_quantized(NPY_DIR)
+    print(f"✅ int8 copy added to {NPY_DIR.resolve()} (scan it with NPY_QUANTIZED=1)")
+
 def main():
+    ap = argparse.ArgumentParser(description="Embed meeting notes into a vector index.")
+    ap.add_argument(
+        "--backend",
+        choices=["chroma", "npy", "both"],
+        default=os.getenv("VECTOR_BACKEND", "chroma"),
+        help="Index format to build (default: chroma)",
+    )
+    ap.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Also write an int8 copy of the npy index (use with NPY_QUANTIZED=1)",
+    )
+    ap.add_argument(
+        "--quantize-existing",
+        action="store_true",
+        help="Only add the int8 copy to the existing npy index, without re-embedding the notes",
+    )
+    ap.add_argument(
+        "--embed-socket",
+        default=embed_server.SOCKET_PATH,
+        help="Embed through the shared server on this socket (default: $EMBED_SOCKET)",
+    )
+    args = ap.parse_args()
+
+    if args.quantize_existing:
+        quantize_npy()
+        return
+
     if not NOTES_DIR.exists():
         sys.exit(f"❌ Notes folder not found: {NOTES_DIR}")
 
@@ -20,28 +99,15 @@ def main():
 
     print(f"[vs] Reading {len(txt_files)} note files from {NOTES_DIR} ...")
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-    texts, metas = [], []
-    for p in txt_files:
-        raw = p.read_text(encoding="utf-8").strip()
-        chunks = splitter.split_text(raw)
-        texts.extend(chunks)
-        metas.extend([{"source": str(p)}] * len(chunks))
+    texts, metas = split_notes(txt_files)
 
     print(f"[vs] Total chunks: {len(texts)}")
 
-    PERSIST_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Local, free embeddings
-    embeddings = HuggingFaceEmbeddings(model_name=MODEL_NAME)
-    vs = Chroma.from_texts(
-        texts=texts,
-        embedding_function=embeddings,
-        metadatas=metas,
-        persist_directory=str(PERSIST_DIR),
-    )
-    vs.persist()
-    print(f"✅ Vector store built at {PERSIST_DIR.resolve()}")
+    embeddings = load_embeddings(args.embed_socket)
+    if args.backend in ("chroma", "both"):
+        build_chroma(texts, metas, embeddings)
+    if args.backend in ("npy", "both"):
+        build_npy(texts, metas, embeddings, quantize=args.quantize)
 
 if __name__ == "__main__":
     main()
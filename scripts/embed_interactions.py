@@ -0,0 +1,63 @@
+"""
+Embed interactions.notes into a dedicated index keyed by interaction_id/client_id.
+
+Run after seeding (or via `python scripts/seed_data.py --embed-interactions`):
+  python scripts/embed_interactions.py --backend npy
+
+Queries then go through rag.retriever.relevant_interactions(), which only
+embeds the topic and loads the matching rows by primary key.
+"""
+
+from __future__ import annotations
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ai_sales_assistant.rag import retriever
+from ai_sales_assistant.rag.ingest import index_interactions
+
+DB_PATH = Path("local.db")
+
+
+def embed_interactions(conn: sqlite3.Connection, backend: str) -> None:
+    conn.row_factory = sqlite3.Row
+    rows = [
+        dict(r)
+        for r in conn.execute(
+            "SELECT interaction_id, client_id, timestamp, notes FROM interactions WHERE notes IS NOT NULL"
+        )
+    ]
+    t0 = time.perf_counter()
+    n_unique = index_interactions(
+        rows,
+        retriever.get_embeddings(),
+        backend,
+        npy_dir=retriever.INTERACTIONS_DIR,
+        chroma_dir=retriever.VECTOR_DIR,
+        collection=retriever.INTERACTIONS_COLLECTION,
+    )
+    print(
+        f"[embed] {len(rows):,} interactions ({n_unique:,} unique notes) → {backend} index "
+        f"in {time.perf_counter() - t0:.1f}s"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backend", choices=["chroma", "npy"], default=retriever.BACKEND)
+    args = ap.parse_args()
+
+    if not DB_PATH.exists():
+        sys.exit("DB not found. Run scripts\\init_db.py and scripts\\seed_data.py first.")
+    with sqlite3.connect(DB_PATH) as conn:
+        embed_interactions(conn, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Run the shared embedding server for all app workers on this host.
+
+  python scripts/embed_server.py --socket /tmp/ai_sales_embed.sock
+
+Then start the app (and build_vectorstore.py) with
+EMBED_SOCKET=/tmp/ai_sales_embed.sock so they embed through the server
+instead of loading their own copy of the model.
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ai_sales_assistant.rag import embed_server
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--socket", default=embed_server.SOCKET_PATH or "/tmp/ai_sales_embed.sock")
+    ap.add_argument("--model", default=embed_server.MODEL_NAME)
+    ap.add_argument("--max-batch", type=int, default=embed_server.MAX_BATCH)
+    ap.add_argument("--max-wait-ms", type=float, default=embed_server.MAX_WAIT_MS,
+                    help="How long the first request in a batch waits for company")
+    args = ap.parse_args()
+    try:
+        embed_server.serve(args.socket, args.model, args.max_batch, args.max_wait_ms)
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
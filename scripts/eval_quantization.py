@@ -0,0 +1,90 @@
+"""
+Measure recall and speed of the int8 npy index against exact float32 search.
+
+Build the index first:
+  python scripts/build_vectorstore.py --backend npy --quantize
+  (or add the int8 copy to an existing index: --quantize-existing)
+Then:
+  python scripts/eval_quantization.py --k 5 --queries 500
+
+Queries are stored chunk vectors with Gaussian noise added (--noise, relative
+to the unit vector), plus the fixed topic queries from bench_retriever, so
+the numbers reflect our own notes corpus. The chunk a query was derived from
+is left out of both result lists; otherwise every query would have one
+trivially-found self match that inflates recall.
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ai_sales_assistant.rag import retriever
+from ai_sales_assistant.rag.npy_index import open_index
+
+
+def _ids(hits, skip=None) -> list[tuple[str, str]]:
+    return [(h["source"], h["text"]) for h in hits if (h["source"], h["text"]) != skip]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--queries", type=int, default=500, help="Max stored vectors to derive queries from")
+    ap.add_argument("--noise", type=float, default=0.3, help="Norm of the perturbation added to each stored vector")
+    ap.add_argument("--rescore", type=int, default=4, help="Candidate multiplier for the float32 pass")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    exact = open_index(retriever.NPY_DIR)
+    quant = open_index(retriever.NPY_DIR, quantized=True)
+
+    rng = np.random.default_rng(args.seed)
+    rows = rng.choice(len(exact), size=min(args.queries, len(exact)), replace=False)
+    live = [slice(None) if seg.live is None else seg.live for seg in exact.segments]
+    stored = np.concatenate([np.asarray(seg.vectors[m]) for seg, m in zip(exact.segments, live)])
+    origin = [(str(r["source"]), str(r["text"])) for seg, m in zip(exact.segments, live) for r in seg.meta[m]]
+    noise = rng.normal(size=(len(rows), stored.shape[1])).astype(np.float32)
+    noise *= args.noise / np.linalg.norm(noise, axis=1, keepdims=True)
+    qvecs = list(stored[rows] + noise)
+    held_out = [origin[i] for i in rows]
+    try:
+        from bench_retriever import QUERIES
+        texts = retriever.get_embeddings().embed_documents(QUERIES)
+        qvecs += [np.asarray(v) for v in texts]
+        held_out += [None] * len(texts)
+    except Exception as e:  # embedder unavailable: stored vectors alone still give a recall figure
+        print(f"[eval] skipping text queries: {e}")
+
+    modes = {"int8": 0, f"int8+rescore x{args.rescore}": args.rescore}
+    recall = {m: 0.0 for m in modes}
+    timings = {"float32": 0.0, **{m: 0.0 for m in modes}}
+    for q, skip in zip(qvecs, held_out):
+        t = time.perf_counter()
+        truth = set(_ids(exact.search(q, k=args.k + 1), skip)[:args.k])
+        timings["float32"] += time.perf_counter() - t
+        for name, rescore in modes.items():
+            t = time.perf_counter()
+            got = _ids(quant.search(q, k=args.k + 1, rescore=rescore), skip)[:args.k]
+            timings[name] += time.perf_counter() - t
+            recall[name] += len(truth.intersection(got)) / len(truth)
+
+    n = len(qvecs)
+    f32_bytes = sum(seg.vectors.nbytes for seg in exact.segments)
+    q8_bytes = sum(seg.codes.nbytes + seg.scales.nbytes for seg in quant.segments)
+    print(f"[eval] {len(exact)} vectors, {n} queries (noise {args.noise}), k={args.k}")
+    print(f"  memory   float32 {f32_bytes:,} B | int8 {q8_bytes:,} B ({f32_bytes / q8_bytes:.2f}x smaller)")
+    print(f"  float32  recall@{args.k} 1.0000 | {timings['float32'] / n * 1000:.3f} ms/query")
+    for name in modes:
+        print(f"  {name:<16} recall@{args.k} {recall[name] / n:.4f} | {timings[name] / n * 1000:.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 from pathlib import Path
+import argparse
+import os
 import sqlite3
 import sys
 import pandas as pd
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ai_sales_assistant.db.repositories import CHANGELOG_KEEP_ROWS, prune_changelog
+
 DB_PATH = Path("local.db")
 RAW_DIR = Path("data/raw")
 
@@ -49,6 +57,14 @@ def load_table(conn: sqlite3.Connection, table: str, csv_path: Path):
     return len(df)
 
 def main():
+    ap = argparse.ArgumentParser(description="Load data/raw CSVs into local.db.")
+    ap.add_argument(
+        "--embed-interactions",
+        action="store_true",
+        help="Also embed interactions.notes for semantic lookup (see embed_interactions.py)",
+    )
+    args = ap.parse_args()
+
     ensure_paths()
     with sqlite3.connect(DB_PATH) as conn:
         conn.execute("PRAGMA foreign_keys=ON;")
@@ -69,5 +85,14 @@ def main():
             (cnt,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
             print(f"  - {table:<13} {cnt:,}")
 
+        if args.embed_interactions:
+            from embed_interactions import embed_interactions
+            embed_interactions(conn, os.getenv("VECTOR_BACKEND", "chroma").lower())
+
+    # Reseeding logs every row through the CDC triggers; keep only the newest entries
+    dropped = prune_changelog(CHANGELOG_KEEP_ROWS, DB_PATH)
+    if dropped:
+        print(f"[seed] Pruned {dropped:,} changelog rows (keeping {CHANGELOG_KEEP_ROWS:,})")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,199 @@
+"""
+Watch data/meeting_notes and upsert changed files into the live vector index.
+
+  python scripts/watch_notes.py --backend npy
+  python scripts/watch_notes.py --backend chroma --poll 2
+
+Uses inotify/FSEvents through `watchdog` when installed, otherwise polls file
+mtimes. Only content changes count (create/modify/move/delete, not opens),
+and a file whose mtime is unchanged since its last flush is skipped, so the
+watcher's own reads never re-queue a note. Bursts of events are debounced,
+then only the touched files are re-embedded, in batches of --batch files. The
+running app's retriever notices the new index stamp and reopens the index on
+its next search.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ai_sales_assistant.rag import retriever
+from ai_sales_assistant.rag.ingest import NOTES_DIR, upsert_chroma, upsert_npy
+
+
+_UNSEEN = object()
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class Pending:
+    """Thread-safe set of changed paths with a quiet-period check.
+
+    Paths are keyed as NOTES_DIR/<name>; `mark_flushed` records the mtime each
+    was indexed at, and a path whose mtime still matches is dropped on drain.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: set[Path] = set()
+        self._last = 0.0
+        self._flushed: dict[Path, Optional[int]] = {}
+
+    def add(self, path: Path) -> None:
+        if path.suffix != ".txt":
+            return
+        with self._lock:
+            self._paths.add(NOTES_DIR / path.name)
+            self._last = time.monotonic()
+
+    def drain_if_quiet(self, debounce: float) -> list[Path]:
+        with self._lock:
+            if not self._paths or time.monotonic() - self._last < debounce:
+                return []
+            out = sorted(self._paths)
+            self._paths.clear()
+            flushed = dict(self._flushed)
+        return [p for p in out if _mtime(p) != flushed.get(p, _UNSEEN)]
+
+    def mark_flushed(self, mtimes: dict[Path, Optional[int]]) -> None:
+        with self._lock:
+            self._flushed.update((NOTES_DIR / p.name, m) for p, m in mtimes.items())
+
+
+def _handler(pending: Pending, base: type):
+    """watchdog handler queueing content changes only.
+
+    watchdog 4 also reports opened/closed events, including our own reads of
+    the note during a flush, so on_any_event would re-queue every flushed file.
+    """
+
+    class Handler(base):
+        def on_created(self, event):
+            if not event.is_directory:
+                pending.add(Path(event.src_path))
+
+        on_modified = on_deleted = on_created
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                pending.add(Path(event.src_path))
+                pending.add(Path(event.dest_path))
+
+    return Handler()
+
+
+def _start_watchdog(pending: Pending):
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    obs = Observer()
+    obs.schedule(_handler(pending, FileSystemEventHandler), str(NOTES_DIR), recursive=False)
+    obs.start()
+    return obs
+
+
+def _scan() -> dict[Path, int]:
+    return {p: p.stat().st_mtime_ns for p in NOTES_DIR.glob("*.txt")}
+
+
+def _poll(pending: Pending, seen: dict[Path, int]) -> dict[Path, int]:
+    now = _scan()
+    for p, mtime in now.items():
+        if seen.get(p) != mtime:
+            pending.add(p)
+    for p in seen.keys() - now.keys():
+        pending.add(p)
+    return now
+
+
+def _relative(paths: list[Path]) -> list[Path]:
+    # Index metadata stores sources as "data/meeting_notes/<file>", like build_vectorstore.py
+    return [NOTES_DIR / p.name for p in paths]
+
+
+def flush(paths: list[Path], backend: str, batch: int, vs=None) -> None:
+    paths = _relative(paths)
+    for i in range(0, len(paths), batch):
+        group = paths[i:i + batch]
+        changed = [p for p in group if p.exists()]
+        removed = [p for p in group if not p.exists()]
+        t0 = time.perf_counter()
+        if backend == "npy":
+            n = upsert_npy(retriever.NPY_DIR, retriever.get_embeddings(), changed, removed)
+        else:
+            n = upsert_chroma(vs, changed, removed, retriever.VECTOR_DIR)
+        print(
+            f"[watch] {len(changed)} changed, {len(removed)} removed → {n} chunks "
+            f"in {(time.perf_counter() - t0) * 1000:.0f} ms"
+        )
+
+
+def process(pending: Pending, debounce: float, flush_fn: Callable[[list[Path]], None]) -> int:
+    """Flush the pending burst once it is quiet; returns the number of files flushed."""
+    paths = pending.drain_if_quiet(debounce)
+    if not paths:
+        return 0
+    # Taken before the flush, so an edit made while it runs is picked up next time
+    mtimes = {p: _mtime(p) for p in paths}
+    try:
+        flush_fn(paths)
+    except Exception as e:
+        print(f"[watch] ERROR: {e}; will retry", file=sys.stderr)
+        for p in paths:
+            pending.add(p)
+        return 0
+    pending.mark_flushed(mtimes)
+    return len(paths)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backend", choices=["chroma", "npy"], default=retriever.BACKEND)
+    ap.add_argument("--debounce", type=float, default=1.5, help="Quiet seconds before flushing a burst")
+    ap.add_argument("--batch", type=int, default=16, help="Files embedded per upsert")
+    ap.add_argument("--poll", type=float, default=1.0, help="Polling interval when watchdog is unavailable")
+    args = ap.parse_args()
+
+    if not NOTES_DIR.exists():
+        sys.exit(f"❌ Notes folder not found: {NOTES_DIR}")
+
+    vs = retriever.load_vectorstore() if args.backend == "chroma" else None
+    pending = Pending()
+    observer = None if os.getenv("WATCH_FORCE_POLL") == "1" else _start_watchdog(pending)
+    seen = _scan()
+    # The index is assumed current at startup, as with the polling baseline
+    pending.mark_flushed(seen)
+    print(f"[watch] {NOTES_DIR} via {'watchdog' if observer else 'polling'} → {args.backend} index")
+    try:
+        while True:
+            time.sleep(min(args.poll, args.debounce) if observer is None else 0.25)
+            if observer is None:
+                seen = _poll(pending, seen)
+            process(pending, args.debounce, lambda paths: flush(paths, args.backend, args.batch, vs))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# (client_id, company_name, owner_name)
+CLIENTS = [(1, "Acme Corp", "Owner A"), (2, "Beta LLC", "Owner A"), (3, "Gamma Inc", "Owner B")]
+
+
+def _interactions():
+    rows = []
+    # Acme: one interaction a month through 2023, all older than a year before 2026-01-01
+    for m in range(12):
+        rows.append((len(rows) + 1, 1, f"2023-{m + 1:02d}-15T10:00:00", "Call", "Owner A", f"acme {m}", "neutral"))
+    for d in (5, 15, 25):
+        rows.append((len(rows) + 1, 2, f"2025-06-{d:02d}T10:00:00", "Email", "Owner A", f"beta {d}", "positive"))
+    for y in (2022, 2023):
+        rows.append((len(rows) + 1, 3, f"{y}-03-01T10:00:00", "Meeting", "Owner B", f"gamma {y}", "negative"))
+    return rows
+
+
+TICKETS = [
+    (1, 1, "Billing", "Resolved", "2023-01-02T00:00:00", "2023-01-09T00:00:00", 7, "Low"),
+    (2, 1, "Technical", "Open", "2025-11-01T00:00:00", None, None, "High"),
+    (3, 2, "Delivery", "Resolved", "2025-10-01T00:00:00", "2025-10-03T00:00:00", 2, "Medium"),
+    (4, 3, "Account", "Pending", "2025-12-01T00:00:00", None, None, "Low"),
+]
+
+
+def make_db(path: Path) -> Path:
+    conn = sqlite3.connect(path)
+    conn.executescript((ROOT / "db" / "schema.sql").read_text(encoding="utf-8"))
+    conn.executemany(
+        "INSERT INTO clients(client_id, company_name, industry, region, owner_name, lifecycle_stage,"
+        " deal_stage, lifetime_value, created_at) VALUES (?, ?, 'Tech', 'EU', ?, 'Customer', 'Closed Won', 1000, '2022-01-01')",
+        CLIENTS,
+    )
+    conn.executemany(
+        "INSERT INTO metrics(client_id, month, spend, satisfaction_score, churn_risk, open_tickets, renewal_due)"
+        " VALUES (?, ?, ?, 4.0, 0.2, 1, 0)",
+        [(c, f"2025-{m:02d}-01", 100.0 * c + m) for c, _, _ in CLIENTS for m in range(1, 6)],
+    )
+    conn.executemany("INSERT INTO interactions VALUES (?, ?, ?, ?, ?, ?, ?)", _interactions())
+    conn.executemany("INSERT INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", TICKETS)
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A small local.db with the real schema, wired into the repositories (no snapshot)."""
+    from ai_sales_assistant.db import repositories, snapshot
+
+    path = make_db(tmp_path / "local.db")
+    monkeypatch.delenv("ARCHIVE_DB", raising=False)
+    monkeypatch.setattr(repositories, "DB_PATH", path)
+    monkeypatch.setattr(snapshot, "ENABLED", False)
+    monkeypatch.setitem(snapshot._state, "uri", None)
+    return path
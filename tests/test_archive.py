@@ -0,0 +1,46 @@
+import sqlite3
+from datetime import datetime
+
+from ai_sales_assistant.db import archive
+from ai_sales_assistant.db import repositories as repo
+
+NOW = datetime(2026, 1, 1)
+
+
+def _count(path, table):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_moves_cold_rows_but_keeps_newest_per_client(db):
+    moved = archive.archive_history(db, interactions_days=365, tickets_days=180, now=NOW, interactions_keep=3)
+
+    # Acme: 12 old rows, newest 3 stay; Beta is recent; Gamma's 2 old rows are its newest
+    assert moved == {"interactions": 9, "tickets": 1}
+    assert _count(db, "interactions") == 17 - 9
+    assert _count(db, "tickets") == 3
+    assert _count(archive.path_for(db), "interactions") == 9
+    assert [r["notes"] for r in repo.recent_interactions("Gamma", 5)] == ["gamma 2023", "gamma 2022"]
+    assert [r["notes"] for r in repo.recent_interactions("Acme", 5)] == ["acme 11", "acme 10", "acme 9"]
+
+
+def test_include_archive_reads_both_tables(db):
+    archive.archive_history(db, interactions_days=365, tickets_days=180, now=NOW, interactions_keep=3)
+
+    both = repo.recent_interactions("Acme", 20, include_archive=True)
+    assert [r["notes"] for r in both] == [f"acme {m}" for m in range(11, -1, -1)]
+    assert {t["ticket_id"] for t in repo.open_tickets("Acme", include_archive=True)} == {1, 2}
+    assert {t["ticket_id"] for t in repo.open_tickets("Acme")} == {2}
+    # Ids from the notes index resolve whichever table holds them
+    assert [r["interaction_id"] for r in repo.interactions_by_ids([1, 12])] == [1, 12]
+
+
+def test_second_run_is_a_no_op(db):
+    archive.archive_history(db, interactions_days=365, tickets_days=180, now=NOW, interactions_keep=3)
+    hot, cold = _count(db, "interactions"), _count(archive.path_for(db), "interactions")
+
+    assert archive.archive_history(db, interactions_days=365, tickets_days=180, now=NOW, interactions_keep=3) == {
+        "interactions": 0,
+        "tickets": 0,
+    }
+    assert (_count(db, "interactions"), _count(archive.path_for(db), "interactions")) == (hot, cold)
@@ -0,0 +1,36 @@
+import sqlite3
+
+from ai_sales_assistant.db import repositories as repo
+
+
+def _write(path, sql, params=()):
+    with sqlite3.connect(path) as conn:
+        conn.execute(sql, params)
+    conn.close()
+
+
+def test_update_versions_the_changed_clients_only(db):
+    since = repo.latest_version()
+    _write(db, "UPDATE tickets SET status = 'Resolved' WHERE ticket_id = 4")
+
+    assert repo.client_versions_since(since) == {3: since + 1}
+    assert repo.client_versions([1, 3]) == {1: repo.client_versions([1])[1], 3: since + 1}
+
+
+def test_moving_a_row_versions_both_clients(db):
+    since = repo.latest_version()
+    _write(db, "UPDATE interactions SET client_id = 2 WHERE interaction_id = 1")
+
+    changed = repo.client_versions_since(since)
+    assert set(changed) == {1, 2}
+    assert repo.latest_version() == max(changed.values())
+
+
+def test_prune_keeps_versions_exact(db):
+    before = repo.client_versions([1, 2, 3])
+    since = repo.latest_version()
+    _write(db, "DELETE FROM tickets WHERE ticket_id = 3")
+
+    assert repo.prune_changelog(keep=0) > 0
+    assert repo.client_versions_since(since) == {2: since + 1}
+    assert repo.client_versions_since(0) == {**before, 2: since + 1}
@@ -0,0 +1,75 @@
+from datetime import date
+
+import numpy as np
+
+from ai_sales_assistant.rag import npy_index
+from ai_sales_assistant.rag.ingest import stamp
+
+
+def _rows(source, n, client="acme", seed=0):
+    vecs = np.random.default_rng(seed).normal(size=(n, 8)).astype(np.float32)
+    texts = [f"{source}-{i}" for i in range(n)]
+    metas = [{"source": source, "client": client, "date": f"2025-01-{i % 9 + 1:02d}"} for i in range(n)]
+    return vecs, texts, metas
+
+
+def _sources(index, q):
+    return sorted(h["source"] for h in index.search(q, k=1000))
+
+
+def test_upsert_replaces_sources_in_a_new_generation(tmp_path):
+    a, b = _rows("a", 10), _rows("b", 10, client="beta", seed=1)
+    npy_index.write_index(tmp_path, np.concatenate([a[0], b[0]]), a[1] + b[1], a[2] + b[2])
+    before, old = stamp(tmp_path), npy_index.open_index(tmp_path)
+
+    vecs, texts, metas = _rows("a", 3, seed=2)
+    npy_index.upsert(tmp_path, vecs, texts, metas, ["a"])
+
+    assert stamp(tmp_path) != before
+    new = npy_index.open_index(tmp_path)
+    assert _sources(new, vecs[0]) == ["a"] * 3 + ["b"] * 10
+    assert new.search(vecs[0], k=1)[0]["text"] == "a-0"
+    assert len(new.search(vecs[0], k=100, client="acme")) == 3
+    # A reader opened earlier still sees its whole generation
+    assert _sources(old, vecs[0]) == ["a"] * 10 + ["b"] * 10
+
+
+def test_many_upserts_are_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(npy_index, "MAX_SEGMENTS", 3)
+    for i in range(10):
+        npy_index.upsert(tmp_path, *_rows(f"n{i}", 2, seed=i), [f"n{i}"])
+    npy_index.upsert(tmp_path, *_rows("n0", 1), ["n0", "n1"])
+
+    manifest = npy_index.read_manifest(tmp_path)
+    assert len(manifest["segments"]) <= 3
+    index = npy_index.open_index(tmp_path)
+    assert len(index) == 17
+    assert _sources(index, np.ones(8)).count("n0") == 1
+
+
+def test_quantizing_an_existing_index_keeps_its_rows(tmp_path):
+    vecs, texts, metas = _rows("a", 20)
+    npy_index.write_index(tmp_path, vecs, texts, metas)
+    npy_index.upsert(tmp_path, *_rows("b", 5, seed=1), ["b"])
+    exact = npy_index.open_index(tmp_path).search(vecs[3], k=5)
+
+    npy_index.write_quantized(tmp_path)
+
+    assert npy_index.read_manifest(tmp_path)["quantized"]
+    quant = npy_index.open_index(tmp_path, quantized=True)
+    assert [h["text"] for h in quant.search(vecs[3], k=5)] == [h["text"] for h in exact]
+    # Later upserts keep writing the int8 copy
+    npy_index.upsert(tmp_path, *_rows("c", 5, seed=2), ["c"])
+    assert len(npy_index.open_index(tmp_path, quantized=True)) == 30
+
+
+def test_undated_chunks_are_not_boosted_by_recency(tmp_path):
+    q = np.ones(8, dtype=np.float32)
+    dates = ["2025-01-01", "2024-01-01", "2023-01-01", ""]
+    metas = [{"source": f"s{i}", "client": "acme", "date": d} for i, d in enumerate(dates)]
+    # Equal similarity everywhere, so only the decay orders the hits
+    npy_index.write_index(tmp_path, np.tile(q, (4, 1)), ["2025", "2024", "2023", "undated"], metas)
+
+    hits = npy_index.open_index(tmp_path).search(q, k=4, half_life_days=365, today=date(2025, 1, 1))
+    assert [h["text"] for h in hits][0] == "2025"
+    assert [h["text"] for h in hits].index("undated") in (1, 2)
@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ai_sales_assistant.agent.ratelimit import RateLimitTimeout, TokenBucketLimiter
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _drain(limiter, tokens=0.0):
+    limiter.store.level.update(requests=limiter.capacity["requests"], tokens=tokens)
+
+
+def _queue_in_order(limiter, sizes):
+    admitted, threads = [], []
+    for i, tokens in enumerate(sizes):
+        t = threading.Thread(target=lambda i=i, tokens=tokens: (limiter.acquire(tokens), admitted.append(i)))
+        t.start()
+        threads.append(t)
+        # Wait until this caller holds its place in line before the next one arrives
+        while limiter.stats()["queue_depth"] < i + 1 and not admitted:
+            time.sleep(0.005)
+    for t in threads:
+        t.join(timeout=5)
+    return admitted
+
+
+def test_callers_are_admitted_in_arrival_order():
+    limiter = TokenBucketLimiter(rpm=6000, tpm=600, state_db=None)  # 10 tokens/s
+    _drain(limiter)
+    # The small calls would fit sooner, but must not overtake the big one at the head
+    assert _queue_in_order(limiter, [4, 1, 1]) == [0, 1, 2]
+    assert limiter.stats()["admitted"] == 3
+
+
+def test_wait_beyond_the_limit_raises_and_frees_the_line():
+    limiter = TokenBucketLimiter(rpm=6000, tpm=60, state_db=None)  # 1 token/s
+    _drain(limiter)
+    t0 = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(30, max_wait=0.5)
+    assert time.monotonic() - t0 < 0.5  # fails up front instead of sleeping to the limit
+    assert limiter.acquire(0, max_wait=0.5) < 0.5
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_reconcile_refunds_and_charges_the_token_bucket():
+    limiter = TokenBucketLimiter(rpm=6000, tpm=600, state_db=None)
+    limiter.acquire(500)
+    level = limiter.store.level["tokens"]
+    limiter.reconcile(estimated=500, actual=100)
+    assert limiter.store.level["tokens"] == pytest.approx(level + 400)
+    limiter.reconcile(estimated=100, actual=300)
+    assert limiter.store.level["tokens"] == pytest.approx(level + 200)
+    limiter.reconcile(estimated=500, actual=0)  # usage unknown: keep the estimate
+    assert limiter.store.level["tokens"] == pytest.approx(level + 200)
+
+
+def _sqlite_levels(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT name, level FROM buckets"))
+    finally:
+        conn.close()
+
+
+def test_sqlite_levels_are_shared_across_processes(tmp_path):
+    state = str(tmp_path / "ratelimit.db")
+    limiter = TokenBucketLimiter(rpm=2, tpm=6000, state_db=state)  # 2 requests, refilled every 30s
+    code = (
+        "from ai_sales_assistant.agent.ratelimit import TokenBucketLimiter as L; "
+        f"l = L(rpm=2, tpm=6000, state_db={state!r}); l.acquire(10, max_wait=0.1); l.acquire(10, max_wait=0.1)"
+    )
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT, env=env, timeout=60)
+
+    # The other process used up both requests, so this one has to queue
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(10, max_wait=0.5)
+    levels = _sqlite_levels(state)
+    assert levels["requests"] < 1
+    # Usage reported above the estimate is charged in the shared file
+    limiter.reconcile(estimated=10, actual=1010)
+    assert _sqlite_levels(state)["tokens"] == pytest.approx(levels["tokens"] - 1000)
@@ -0,0 +1,31 @@
+import pytest
+
+from ai_sales_assistant.db import repositories as repo
+
+from conftest import CLIENTS
+
+NAMES = {cid: name for cid, name, _ in CLIENTS}
+
+
+@pytest.mark.parametrize("select", [{"client_ids": [3, 1, 2, 99]}, {"owner_name": "Owner A"}])
+def test_bulk_reads_match_the_per_client_functions(db, select):
+    expected_ids = [1, 2, 3] if "client_ids" in select else [1, 2]
+
+    overviews = list(repo.client_overviews(**select))
+    assert overviews == [repo.client_overview(NAMES[cid]) for cid in expected_ids]
+
+    assert dict(repo.kpi_snapshot_many(**select, months=3)) == {
+        cid: repo.kpi_snapshot(NAMES[cid], 3) for cid in expected_ids
+    }
+    assert dict(repo.recent_interactions_many(**select, limit=5)) == {
+        cid: repo.recent_interactions(NAMES[cid], 5) for cid in expected_ids
+    }
+    # Clients without matching tickets are skipped by the bulk variant
+    assert dict(repo.open_tickets_many(**select, statuses=None)) == {
+        cid: repo.open_tickets(NAMES[cid]) for cid in expected_ids if repo.open_tickets(NAMES[cid])
+    }
+    assert dict(repo.open_tickets_many(**select, statuses=["Pending"])) == {
+        cid: rows
+        for cid in expected_ids
+        if (rows := repo.open_tickets(NAMES[cid], status="Pending"))
+    }
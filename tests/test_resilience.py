@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from ai_sales_assistant.agent.ratelimit import TokenBucketLimiter
+from ai_sales_assistant.agent.resilience import (
+    BudgetExceeded,
+    FakeLatencyChatModel,
+    LatencyTracker,
+    ResilientChatModel,
+    brief_budget,
+    tracker_for,
+)
+
+
+def _wrap(inner, **kw):
+    # Short cutoffs so every test finishes well under a second or two
+    opts = dict(max_retries=2, backoff_s=0.01, min_timeout_s=0.05, initial_timeout_s=0.3, tracker=LatencyTracker())
+    opts.update(kw)
+    return ResilientChatModel(inner=inner, **opts)
+
+
+def test_slow_attempt_is_cut_off_and_retried():
+    inner = FakeLatencyChatModel(responses=["ok"], latency_script=[2.0], latency_s=0.01)
+    llm = _wrap(inner)
+    t0 = time.monotonic()
+    assert llm.invoke("hi").content == "ok"
+    assert time.monotonic() - t0 < 1.0
+    assert inner.calls == 2
+
+
+def test_errors_are_retried_then_raised():
+    inner = FakeLatencyChatModel(latency_s=0.01, error_prob=1.0)
+    llm = _wrap(inner, max_retries=1)
+    with pytest.raises(ConnectionError, match="injected"):
+        llm.invoke("hi")
+    assert inner.calls == 2
+
+
+class _ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _failing(status_code):
+    def respond(messages):
+        raise _ProviderError(status_code)
+    return respond
+
+
+def test_non_transient_errors_are_not_retried():
+    for status in (400, 401):
+        inner = FakeLatencyChatModel(latency_s=0.01, respond=_failing(status))
+        with pytest.raises(_ProviderError):
+            _wrap(inner, max_retries=3).invoke("hi")
+        assert inner.calls == 1
+
+
+def test_rate_limited_and_server_errors_are_retried():
+    for status in (429, 503):
+        inner = FakeLatencyChatModel(latency_s=0.01, respond=_failing(status))
+        with pytest.raises(_ProviderError):
+            _wrap(inner, max_retries=2).invoke("hi")
+        assert inner.calls == 3
+
+
+def test_threshold_follows_recent_latencies():
+    tracker = LatencyTracker(min_samples=5)
+    assert tracker.threshold(0.95, 1.5, floor=0.01, initial=7.0) == 7.0
+    for _ in range(5):
+        tracker.record(0.1)
+    assert tracker.threshold(0.95, 1.5, floor=0.01, initial=7.0) == pytest.approx(0.15)
+    # Cutoff derived from history: a 0.5s call is abandoned long before initial_timeout_s
+    inner = FakeLatencyChatModel(responses=["ok"], latency_script=[0.5], latency_s=0.01)
+    llm = _wrap(inner, tracker=tracker, initial_timeout_s=5.0)
+    t0 = time.monotonic()
+    llm.invoke("hi")
+    assert time.monotonic() - t0 < 0.45
+    assert inner.calls == 2
+
+
+def test_tracker_is_shared_per_model_name():
+    assert tracker_for("model-a") is tracker_for("model-a")
+    assert tracker_for("model-a") is not tracker_for("model-b")
+    a = ResilientChatModel(inner=FakeLatencyChatModel())
+    b = ResilientChatModel(inner=FakeLatencyChatModel())
+    assert a._tracker() is b._tracker()
+
+
+def test_hedge_answers_from_the_duplicate():
+    inner = FakeLatencyChatModel(responses=["ok"], latency_script=[2.0], latency_s=0.01)
+    llm = _wrap(inner, hedge=True, max_retries=0, initial_timeout_s=0.4)
+    t0 = time.monotonic()
+    assert llm.invoke("hi").content == "ok"
+    # Hedge fires at half the cutoff and wins; no retry needed
+    assert time.monotonic() - t0 < 0.4
+    assert inner.calls == 2
+
+
+def test_fast_failure_keeps_waiting_for_the_hedge():
+    answers = iter([ConnectionError("first request dropped"), "ok"])
+
+    def respond(messages):
+        out = next(answers)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+    # Hedge fires at 0.5s; the first request fails at 0.6s, the hedge answers at 0.8s
+    inner = FakeLatencyChatModel(respond=respond, latency_script=[0.6, 0.3])
+    llm = _wrap(inner, hedge=True, max_retries=2, initial_timeout_s=1.0)
+    assert llm.invoke("hi").content == "ok"
+    assert inner.calls == 2
+
+
+def test_budget_stops_retries():
+    inner = FakeLatencyChatModel(latency_s=2.0)
+    llm = _wrap(inner, max_retries=5, initial_timeout_s=1.0)
+    t0 = time.monotonic()
+    with brief_budget(0.3), pytest.raises(BudgetExceeded):
+        llm.invoke("hi")
+    assert time.monotonic() - t0 < 0.6
+
+
+def test_limiter_wait_is_not_counted_as_slowness():
+    limiter = TokenBucketLimiter(rpm=120, tpm=1e9, state_db=None)
+    limiter.store.level["requests"] = 0.0  # next request admitted after ~0.5s
+    inner = FakeLatencyChatModel(responses=["ok"], latency_s=0.01)
+    llm = _wrap(inner, limiter=limiter, initial_timeout_s=0.2)
+    assert llm.invoke("hi").content == "ok"
+    assert inner.calls == 1
+    assert limiter.stats()["max_wait_s"] >= 0.3
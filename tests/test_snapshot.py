@@ -0,0 +1,74 @@
+import os
+import sqlite3
+
+import pytest
+
+from ai_sales_assistant.db import repositories as repo
+from ai_sales_assistant.db import snapshot
+
+
+class _Stop(Exception):
+    pass
+
+
+@pytest.fixture
+def snap(db, monkeypatch):
+    """Snapshot state pointed at the test DB, without the background thread."""
+    for key, value in {"keeper": None, "db_path": db, "mtime": None, "loaded_at": 0.0, "gen": 0}.items():
+        monkeypatch.setitem(snapshot._state, key, value)
+    yield db
+    if snapshot._state["keeper"] is not None:
+        snapshot._state["keeper"].close()
+
+
+def _watch_once(monkeypatch):
+    """Run one poll of the watcher loop in this thread."""
+    ticks = iter([None])
+
+    def sleep(_):
+        if next(ticks, _Stop) is _Stop:
+            raise _Stop
+
+    monkeypatch.setattr(snapshot.time, "sleep", sleep)
+    with pytest.raises(_Stop):
+        snapshot._watch()
+
+
+def _add_interaction(path, notes):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "INSERT INTO interactions VALUES (100, 2, '2025-12-01T10:00:00', 'Call', 'Owner A', ?, 'positive')",
+            (notes,),
+        )
+    conn.close()
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))  # coarse-mtime filesystems
+
+
+def test_readers_see_new_rows_once_the_file_changes(snap, monkeypatch):
+    snapshot.refresh()
+    _add_interaction(snap, "beta renewal")
+    # Reads are served from the in-memory copy, which predates the write
+    assert repo.recent_interactions("Beta", 1)[0]["notes"] == "beta 25"
+
+    _watch_once(monkeypatch)
+    assert snapshot._state["gen"] == 2
+    assert repo.recent_interactions("Beta", 1)[0]["notes"] == "beta renewal"
+
+    _watch_once(monkeypatch)  # file unchanged: the generation is kept
+    assert snapshot._state["gen"] == 2
+
+
+def test_reads_fall_back_to_the_file_without_a_snapshot(snap, monkeypatch):
+    def broken():
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(snapshot, "ENABLED", True)
+    monkeypatch.setattr(snapshot, "_thread", None)
+    monkeypatch.setattr(snapshot, "refresh", broken)
+    monkeypatch.setattr(snapshot, "_watch", lambda: None)
+    _add_interaction(snap, "beta renewal")
+
+    assert repo.recent_interactions("Beta", 1)[0]["notes"] == "beta renewal"
+    assert snapshot._thread is not None  # the load was attempted; its watcher would keep retrying
+    assert snapshot.connect() is None
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "scripts") not in sys.path:
+    sys.path.insert(0, str(ROOT / "scripts"))
+
+import watch_notes  # noqa: E402
+
+
+@pytest.fixture
+def notes(tmp_path, monkeypatch):
+    monkeypatch.setattr(watch_notes, "NOTES_DIR", tmp_path)
+    return tmp_path
+
+
+def test_one_write_flushes_once(notes):
+    pending = watch_notes.Pending()
+    pending.mark_flushed(watch_notes._scan())
+    flushes = []
+
+    def flush(paths):
+        flushes.append(paths)
+        for p in paths:
+            if p.exists():
+                p.read_text()
+            pending.add(p)  # what an open/close event for our own read would do
+
+    note = notes / "acme_1.txt"
+    note.write_text("Date: 2025-01-01\nRenewal talk")
+    pending.add(note)
+    for _ in range(5):
+        watch_notes.process(pending, 0, flush)
+    assert flushes == [[note]]
+
+    pending.add(notes / "acme_2.txt")  # deleted before ever being indexed: flushed as a removal once
+    watch_notes.process(pending, 0, flush)
+    pending.add(notes / "acme_2.txt")
+    watch_notes.process(pending, 0, flush)
+    assert len(flushes) == 2
+
+
+def test_handler_ignores_open_events(notes):
+    events = pytest.importorskip("watchdog.events")
+    pending = watch_notes.Pending()
+    handler = watch_notes._handler(pending, events.FileSystemEventHandler)
+    path = str(notes / "acme_1.txt")
+    for name in ("FileOpenedEvent", "FileClosedNoWriteEvent"):
+        if hasattr(events, name):
+            handler.dispatch(getattr(events, name)(path))
+    assert pending.drain_if_quiet(0) == []
+    handler.dispatch(events.FileModifiedEvent(path))
+    assert pending.drain_if_quiet(0) == [notes / "acme_1.txt"]